@@ -1,9 +1,23 @@
 # time_tracker.py
 
 import os
+import re
 import sys
+import time
+import csv
 import json
+import ctypes
+import ctypes.util
+import gzip
+import mmap
 import shutil
+import struct
+import argparse
+import multiprocessing
+import threading
+from collections import OrderedDict, deque, namedtuple
+from collections.abc import MutableMapping
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime, date, timedelta
 
 # ==============================================================================
@@ -32,13 +46,614 @@ from ttkbootstrap.toast import ToastNotification
 from ttkbootstrap.tooltip import ToolTip
 
 DATA_FILE = "time_tracker_data.json"
+SNAPSHOT_FILE = "time_tracker_data.stts"
+CATEGORY_BAR_LIMIT = 8 # Buttons beyond this many go into the collapsible overflow list
+CATEGORY_OVERFLOW_COLUMNS = 4
+PREFETCH_RADIUS = 3 # Days on each side of the displayed date kept prepared in advance
+DAY_VIEW_CACHE_SIZE = 32
+DEFAULT_UNDO_DEPTH = 100
+IDLE_POLL_MS = 5000 # Idle checks are deliberately much coarser than the 200 ms timer tick
+
+# ==============================================================================
+# Compact snapshot storage
+# ==============================================================================
+# Layout (little-endian): header, JSON meta block (categories + settings), string table
+# (offsets + UTF-8 blob), day table and fixed-width activity records. Category, name and
+# notes strings are interned; index 0 is always the empty string.
+SNAPSHOT_MAGIC = b"STTS"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_HEADER = struct.Struct("<4sHHIIII") # magic, version, reserved, strings, days, records, meta bytes
+SNAPSHOT_DAY = struct.Struct("<III") # date ordinal, first record, record count
+SNAPSHOT_RECORD_FORMATS = {
+    1: struct.Struct("<IHHIIII"), # date ordinal, start min, end min, duration ms, category, name, notes
+}
+# SNAPSHOT_MIGRATIONS[n] upgrades a decoded version-n activity dict to version n + 1.
+SNAPSHOT_MIGRATIONS = {}
+
+def _time_to_minutes(value):
+    hours, minutes = value.split(':')
+    return int(hours) * 60 + int(minutes)
+
+def _activity_row(act):
+    # (start min, end min, duration ms, category, name, notes): one record as write_snapshot stores it.
+    return (_time_to_minutes(act['start']), _time_to_minutes(act['end']), int(round(act.get('duration_seconds', 0) * 1000)),
+            act.get('category') or "", act.get('name') or "", act.get('notes') or "")
+
+def write_snapshot(path, categories, activities, settings):
+    rows_by_day = ((date_str, [_activity_row(act) for act in activities[date_str]]) for date_str in sorted(activities))
+    _write_snapshot_rows(path + ".tmp", categories, rows_by_day, settings)
+    os.replace(path + ".tmp", path)
+
+def _write_snapshot_rows(path, categories, rows_by_day, settings):
+    # rows_by_day yields (date_str, [_activity_row tuples]) in date order.
+    strings, string_index = [""], {"": 0}
+    def intern(value):
+        value = value or ""
+        if value not in string_index:
+            string_index[value] = len(strings)
+            strings.append(value)
+        return string_index[value]
+
+    record_struct = SNAPSHOT_RECORD_FORMATS[SNAPSHOT_VERSION]
+    day_rows, record_rows = [], []
+    for date_str, rows in rows_by_day:
+        ordinal = datetime.strptime(date_str, "%Y-%m-%d").toordinal()
+        day_rows.append(SNAPSHOT_DAY.pack(ordinal, len(record_rows), len(rows)))
+        for start, end, duration_ms, category, name, notes in rows:
+            record_rows.append(record_struct.pack(ordinal, start, end, duration_ms, intern(category), intern(name), intern(notes)))
+
+    encoded = [value.encode('utf-8') for value in strings]
+    offsets, position = [], 0
+    for blob in encoded:
+        offsets.append(position); position += len(blob)
+    offsets.append(position)
+    meta = json.dumps({'categories': list(categories), 'settings': settings}, ensure_ascii=False).encode('utf-8')
+
+    with open(path, 'wb') as f:
+        f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, 0, len(strings), len(day_rows), len(record_rows), len(meta)))
+        f.write(meta)
+        f.write(struct.pack(f"<{len(offsets)}I", *offsets))
+        f.write(b"".join(encoded))
+        f.write(b"".join(day_rows))
+        f.write(b"".join(record_rows))
+
+class SnapshotReader:
+    # Maps a snapshot file and decodes only the days (and strings) that are asked for.
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, self.version, _, n_strings, n_days, n_records, meta_len = SNAPSHOT_HEADER.unpack_from(self._mm, 0)
+            if magic != SNAPSHOT_MAGIC:
+                raise ValueError(f"{path} is not a time tracker snapshot")
+            if self.version not in SNAPSHOT_RECORD_FORMATS:
+                raise ValueError(f"Snapshot version {self.version} is newer than this program supports ({SNAPSHOT_VERSION})")
+            position = SNAPSHOT_HEADER.size
+            self._record_struct = SNAPSHOT_RECORD_FORMATS[self.version]
+            expected_size = (position + meta_len + 4 * (n_strings + 1) + n_days * SNAPSHOT_DAY.size + n_records * self._record_struct.size)
+            if len(self._mm) < expected_size: # Checked before reading the tables; the string blob is checked below
+                raise ValueError(f"{path} is truncated ({len(self._mm)} of at least {expected_size} bytes)")
+            self.meta = json.loads(self._mm[position:position + meta_len].decode('utf-8'))
+            position += meta_len
+            self._offsets = struct.unpack_from(f"<{n_strings + 1}I", self._mm, position)
+            position += 4 * (n_strings + 1)
+            self._blob_start = position
+            position += self._offsets[-1]
+            self._days = {}
+            for i in range(n_days):
+                ordinal, first, count = SNAPSHOT_DAY.unpack_from(self._mm, position + i * SNAPSHOT_DAY.size)
+                self._days[date.fromordinal(ordinal).strftime("%Y-%m-%d")] = (first, count)
+            self._records_start = position + n_days * SNAPSHOT_DAY.size
+            if len(self._mm) < self._records_start + n_records * self._record_struct.size:
+                raise ValueError(f"{path} is truncated ({len(self._mm)} of {self._records_start + n_records * self._record_struct.size} bytes)")
+            self._strings = [None] * n_strings
+        except Exception:
+            self.close()
+            raise
+
+    def _string(self, index):
+        value = self._strings[index]
+        if value is None:
+            start, end = self._blob_start + self._offsets[index], self._blob_start + self._offsets[index + 1]
+            value = self._strings[index] = self._mm[start:end].decode('utf-8')
+        return value
+
+    def day_keys(self):
+        return self._days.keys()
+
+    def read_day(self, date_str):
+        first, count = self._days[date_str]
+        activities = []
+        for i in range(first, first + count):
+            _, start, end, duration_ms, category, name, notes = self._record_struct.unpack_from(self._mm, self._records_start + i * self._record_struct.size)
+            act = {'category': self._string(category), 'name': self._string(name),
+                   'start': f"{start // 60:02}:{start % 60:02}", 'end': f"{end // 60:02}:{end % 60:02}",
+                   'duration_seconds': duration_ms / 1000, 'notes': self._string(notes)}
+            for version in range(self.version, SNAPSHOT_VERSION):
+                act = SNAPSHOT_MIGRATIONS[version](act)
+            activities.append(act)
+        return activities
+
+    def read_rows(self, date_str):
+        # Records as _activity_row tuples, taken straight from the mapping without building activity dicts.
+        if self.version != SNAPSHOT_VERSION: return [_activity_row(act) for act in self.read_day(date_str)]
+        first, count = self._days[date_str]
+        rows = []
+        for i in range(first, first + count):
+            _, start, end, duration_ms, category, name, notes = self._record_struct.unpack_from(self._mm, self._records_start + i * self._record_struct.size)
+            rows.append((start, end, duration_ms, self._string(category), self._string(name), self._string(notes)))
+        return rows
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+
+class ActivityStore(MutableMapping):
+    # The date -> activities mapping the app works on. Live days come from a dict or a snapshot (decoded
+    # the first time they are read); archived days are served read-only from ArchiveSource objects until
+    # make_live() copies one into the live set. An empty live list over an archived day is a tombstone.
+    def __init__(self, days=None, reader=None, archives=None):
+        self._days = dict(days or {})
+        self._reader = reader
+        self._removed = set()
+        self.set_archives(archives or [])
+
+    def set_archives(self, archives):
+        self.archives = list(archives)
+        self._archived = {date_str: archive for archive in self.archives for date_str in archive.day_keys()}
+
+    def _in_reader(self, date_str):
+        return self._reader is not None and date_str in self._reader.day_keys() and date_str not in self._removed
+
+    def _is_live(self, date_str):
+        return date_str in self._days or self._in_reader(date_str)
+
+    def __getitem__(self, date_str):
+        if date_str not in self._days:
+            if self._in_reader(date_str):
+                self._days[date_str] = self._reader.read_day(date_str)
+            elif date_str in self._archived:
+                return self._archived[date_str].read_day(date_str)
+            else:
+                raise KeyError(date_str)
+        return self._days[date_str]
+
+    def __setitem__(self, date_str, activities):
+        self._days[date_str] = activities
+
+    def __delitem__(self, date_str):
+        in_reader = self._in_reader(date_str)
+        if date_str not in self._days and not in_reader and date_str not in self._archived: raise KeyError(date_str)
+        self._days.pop(date_str, None)
+        if in_reader: self._removed.add(date_str)
+        if date_str in self._archived: self._days[date_str] = []
+
+    def __contains__(self, date_str):
+        if date_str in self._days: return bool(self._days[date_str]) or date_str not in self._archived
+        return self._in_reader(date_str) or date_str in self._archived
+
+    def __iter__(self):
+        for date_str in self.live_keys():
+            if date_str in self: yield date_str
+        yield from [d for d in self._archived if not self._is_live(d)]
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def live_keys(self):
+        keys = list(self._days)
+        if self._reader is not None:
+            keys += [d for d in self._reader.day_keys() if d not in self._days and d not in self._removed]
+        return keys
+
+    def make_live(self, date_str):
+        # Copy-on-write: an archived day becomes part of the live data before it is modified.
+        if not self._is_live(date_str) and date_str in self._archived:
+            self._days[date_str] = list(self._archived[date_str].read_day(date_str))
+
+    def day_totals(self, date_str):
+        # Per-category seconds, answered from an archive's summary without decompressing it, and from
+        # the snapshot's records without decoding (and keeping) the day.
+        if date_str in self._days: return summarize_day(self._days[date_str])
+        if self._in_reader(date_str):
+            totals = {}
+            for _, _, duration_ms, category, _, _ in self._reader.read_rows(date_str): totals[category] = totals.get(category, 0) + duration_ms / 1000
+            return totals
+        if date_str in self._archived: return self._archived[date_str].day_totals(date_str)
+        return {}
+
+    def detach(self):
+        # Decode everything still in the snapshot and release the mapping (needed before the file is replaced).
+        if self._reader is None: return
+        for date_str in self.live_keys(): self[date_str]
+        self._reader.close()
+        self._reader = None
+        self._removed.clear()
+
+    def live_name_categories(self):
+        # (name, category) of every live record; snapshot days are read as raw records, not decoded and kept.
+        for date_str in self.live_keys():
+            if date_str in self._days:
+                for act in self._days[date_str]: yield act.get('name') or "", act.get('category') or ""
+            else:
+                for _, _, _, category, name, _ in self._reader.read_rows(date_str): yield name, category
+
+    def save_snapshot(self, path, categories, settings):
+        # Writes the live days as a snapshot. Days never read are copied from the current mapping without
+        # being decoded, so a save after one edit doesn't materialise the whole history.
+        rows_by_day = ((date_str, [_activity_row(act) for act in self._days[date_str]] if date_str in self._days else self._reader.read_rows(date_str))
+                       for date_str in sorted(self.live_keys()))
+        _write_snapshot_rows(path + ".tmp", categories, rows_by_day, settings)
+        old_path = self._reader.path if self._reader is not None else None
+        if self._reader is not None: self._reader.close() # A mapped file can't be replaced on Windows
+        try:
+            os.replace(path + ".tmp", path)
+        except OSError:
+            if old_path: self._reader = SnapshotReader(old_path)
+            raise
+        # The new file now holds every live day, so it backs the days that are still undecoded.
+        self._reader = SnapshotReader(path)
+        self._removed.clear()
+
+    def drop_live(self, date_str):
+        # Forget a live day without leaving a tombstone (used once it has been written to an archive).
+        self._days.pop(date_str, None)
+        if self._in_reader(date_str): self._removed.add(date_str)
+
+    def live_dict(self):
+        return {date_str: self[date_str] for date_str in self.live_keys()}
+
+    def to_dict(self):
+        return {date_str: self[date_str] for date_str in self}
+
+# ==============================================================================
+# Cold archives
+# ==============================================================================
+# One gzip-compressed JSON file per archived year plus a small uncompressed summary
+# with per-day and per-category totals, so totals never need the raw records.
+ARCHIVE_DIR = "time_tracker_archive"
+
+class ArchiveSource:
+    def __init__(self, data_path, summary_path):
+        self.data_path = data_path
+        with open(summary_path, 'r', encoding='utf-8') as f:
+            self.summary = json.load(f)
+        self._activities = None
+
+    def day_keys(self):
+        return self.summary['days'].keys()
+
+    def day_totals(self, date_str):
+        return dict(self.summary['days'].get(date_str, {}))
+
+    def activities(self):
+        if self._activities is None:
+            with gzip.open(self.data_path, 'rt', encoding='utf-8') as f:
+                self._activities = json.load(f)['activities']
+        return self._activities
+
+    def read_day(self, date_str):
+        return self.activities()[date_str]
+
+def _archive_paths(archive_dir, year):
+    return os.path.join(archive_dir, f"{year}.json.gz"), os.path.join(archive_dir, f"{year}.summary.json")
+
+def load_archives(archive_dir):
+    archives = []
+    if not os.path.isdir(archive_dir): return archives
+    for name in sorted(os.listdir(archive_dir)):
+        if not name.endswith(".json.gz"): continue
+        data_path, summary_path = _archive_paths(archive_dir, name[:-len(".json.gz")])
+        if os.path.exists(summary_path): archives.append(ArchiveSource(data_path, summary_path))
+    return archives
+
+def write_archive(archive_dir, year, activities):
+    os.makedirs(archive_dir, exist_ok=True)
+    data_path, summary_path = _archive_paths(archive_dir, year)
+    days = {date_str: summarize_day(activities[date_str]) for date_str in sorted(activities)}
+    categories = {}
+    for totals in days.values(): merge_totals(categories, totals)
+    with gzip.open(data_path + ".tmp", 'wt', encoding='utf-8') as f:
+        json.dump({'activities': activities}, f, ensure_ascii=False)
+    with open(summary_path + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump({'year': year, 'days': days, 'categories': categories}, f, ensure_ascii=False)
+    os.replace(data_path + ".tmp", data_path)
+    os.replace(summary_path + ".tmp", summary_path)
+
+def archive_days_before(store, archive_dir, before_year):
+    # Moves live days older than `before_year` into per-year archives, merging with existing ones.
+    by_year = {}
+    for date_str in store.live_keys():
+        if int(date_str[:4]) < before_year: by_year.setdefault(date_str[:4], []).append(date_str)
+    existing = {os.path.basename(a.data_path)[:-len(".json.gz")]: a for a in store.archives}
+    for year, date_keys in sorted(by_year.items()):
+        merged = dict(existing[year].activities()) if year in existing else {}
+        for date_str in date_keys:
+            day_activities = store[date_str]
+            if day_activities: merged[date_str] = day_activities
+            else: merged.pop(date_str, None) # tombstone
+        write_archive(archive_dir, year, merged)
+    for date_keys in by_year.values():
+        for date_str in date_keys: store.drop_live(date_str)
+    store.set_archives(load_archives(archive_dir))
+    return sum(len(keys) for keys in by_year.values())
+
+def read_data_path(path, with_archives=True, require_activities=False):
+    # Returns (categories, activities, settings) for a JSON or snapshot data file. The app's own data
+    # file picks up the archive folder next to it. require_activities rejects JSON files that aren't
+    # time tracker data at all (no 'activities' mapping).
+    archives = []
+    if with_archives and os.path.basename(path) in (DATA_FILE, SNAPSHOT_FILE):
+        archives = load_archives(os.path.join(os.path.dirname(path), ARCHIVE_DIR))
+    if path.endswith(".stts"):
+        reader = SnapshotReader(path)
+        return reader.meta.get('categories', []), ActivityStore(reader=reader, archives=archives), reader.meta.get('settings', {})
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if not isinstance(data, dict) or not isinstance(data.get('activities', {}), dict):
+        raise ValueError("not a time tracker data file (expected an object with an 'activities' mapping)")
+    if require_activities and not isinstance(data.get('activities'), dict):
+        raise ValueError("not a time tracker data file (no 'activities' mapping)")
+    return data.get('categories', []), ActivityStore(data.get('activities', {}), archives=archives), data.get('settings', {})
+
+def read_data_file():
+    # The compact snapshot wins when both files exist.
+    return read_data_path(SNAPSHOT_FILE if os.path.exists(SNAPSHOT_FILE) else DATA_FILE)
+
+def is_iso_date(value):
+    # Date ranges are compared as strings, so only zero-padded YYYY-MM-DD dates work (strptime alone accepts 2026-1-5).
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").strftime("%Y-%m-%d") == value
+    except (TypeError, ValueError):
+        return False
+
+def iter_day_totals(activities, start_str=None, end_str=None):
+    # (date_str, per-category seconds) over "YYYY-MM-DD" keys in [start_str, end_str]; ISO dates compare as strings.
+    for date_str in activities:
+        if (start_str and date_str < start_str) or (end_str and date_str > end_str): continue
+        if isinstance(activities, ActivityStore): yield date_str, activities.day_totals(date_str)
+        else: yield date_str, summarize_day(activities[date_str])
+
+# ==============================================================================
+# Aggregation
+# ==============================================================================
+def summarize_day(day_activities, totals=None):
+    totals = {} if totals is None else totals
+    for activity in day_activities:
+        category = activity.get('category')
+        totals[category] = totals.get(category, 0) + activity.get('duration_seconds', 0)
+    return totals
+
+def summarize_range(activities, start_str=None, end_str=None):
+    totals = {}
+    for _, day_totals in iter_day_totals(activities, start_str, end_str): merge_totals(totals, day_totals)
+    return totals
+
+def merge_totals(target, partial):
+    for category, seconds in partial.items():
+        target[category] = target.get(category, 0) + seconds
+    return target
+
+def _person_name(path):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    if stem in (os.path.splitext(DATA_FILE)[0], os.path.splitext(SNAPSHOT_FILE)[0]):
+        return os.path.basename(os.path.dirname(os.path.abspath(path))) # one folder per person
+    return stem
+
+def _summarize_data_file(path, start_str, end_str):
+    # Runs in a worker process and only ships the per-category totals back.
+    _, activities, _ = read_data_path(path, require_activities=True)
+    return _person_name(path), summarize_range(activities, start_str, end_str)
+
+BACKUP_PREFIX = "time_tracker_backup_"
+
+def find_data_files(directory):
+    # One file per person. A folder holding the app's own data file is that person's folder, so nothing
+    # else in it counts; elsewhere each .json/.stts file is a person. Backups and archive folders (read
+    # together with the data file next to them) are never counted.
+    found = []
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = sorted(name for name in dirs if name != ARCHIVE_DIR)
+        own_files = [name for name in (SNAPSHOT_FILE, DATA_FILE) if name in files] # The snapshot wins, as in read_data_file
+        if own_files:
+            found.append(os.path.join(root, own_files[0])); continue
+        found.extend(os.path.join(root, name) for name in sorted(files) if name.endswith((".json", ".stts")) and not name.startswith(BACKUP_PREFIX) and not name.endswith(".summary.json"))
+    return found
+
+def build_team_report(directory, start_str=None, end_str=None, max_workers=None):
+    report = {'people': {}, 'categories': {}, 'errors': []}
+    paths = find_data_files(directory)
+    if not paths: return report
+    # Spawned, not forked: the GUI calls this from a helper thread of a running Tk process.
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        futures = {executor.submit(_summarize_data_file, path, start_str, end_str): path for path in paths}
+        for future in as_completed(futures):
+            try:
+                person, totals = future.result()
+            except Exception as e:
+                report['errors'].append((futures[future], str(e)))
+                continue
+            merge_totals(report['people'].setdefault(person, {}), totals)
+            merge_totals(report['categories'], totals)
+    return report
+
+def format_team_report(report, start_str=None, end_str=None):
+    lines = [f"Team Report ({start_str or 'beginning'} to {end_str or 'today'})", ""]
+    for person in sorted(report['people']):
+        totals = report['people'][person]
+        lines.append(f"{person}: {sum(totals.values()) / 3600:.2f}h")
+        for category in sorted(totals, key=lambda c: -totals[c]):
+            lines.append(f"  {category}: {totals[category] / 3600:.2f}h")
+    lines += ["", "=" * 50, "", "By Category", ""]
+    for category in sorted(report['categories'], key=lambda c: -report['categories'][c]):
+        lines.append(f"{category}: {report['categories'][category] / 3600:.2f}h")
+    lines.append(f"Total Time: {sum(report['categories'].values()) / 3600:.2f}h")
+    for path, error in report['errors']:
+        lines.append(f"Skipped {path}: {error}")
+    return "\n".join(lines)
+
+# ==============================================================================
+# Statistics
+# ==============================================================================
+STATS_GROUPINGS = ("day", "week", "month")
+
+def _bucket_start(day, grouping):
+    if grouping == "week": return day - timedelta(days=day.weekday())
+    if grouping == "month": return day.replace(day=1)
+    return day
+
+def _next_bucket(day, grouping):
+    if grouping == "week": return day + timedelta(days=7)
+    if grouping == "month": return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return day + timedelta(days=1)
+
+def category_series(activities, start_day, end_day, grouping):
+    # (bucket start dates, {category: [seconds per bucket]}), built from per-day totals only.
+    buckets, bucket = [], _bucket_start(start_day, grouping)
+    while bucket <= end_day:
+        buckets.append(bucket); bucket = _next_bucket(bucket, grouping)
+    index = {b: i for i, b in enumerate(buckets)}
+    series = {}
+    for date_str, totals in iter_day_totals(activities, start_day.isoformat(), end_day.isoformat()):
+        i = index[_bucket_start(datetime.strptime(date_str, "%Y-%m-%d").date(), grouping)]
+        for category, seconds in totals.items():
+            series.setdefault(category, [0] * len(buckets))[i] += seconds
+    return buckets, series
+
+def weekday_hour_distribution(activities, start_day, end_day):
+    # 7 x 24 seconds matrix (Monday first); each record is spread over the hours it covers.
+    grid = [[0] * 24 for _ in range(7)]
+    for date_str in activities:
+        if not (start_day.isoformat() <= date_str <= end_day.isoformat()): continue
+        weekday = datetime.strptime(date_str, "%Y-%m-%d").weekday()
+        for act in activities[date_str]:
+            position, remaining = _time_to_minutes(act['start']) * 60, act.get('duration_seconds', 0)
+            while remaining > 0:
+                hour = int(position // 3600)
+                chunk = min(remaining, (hour + 1) * 3600 - position)
+                grid[(weekday + hour // 24) % 7][hour % 24] += chunk
+                position += chunk; remaining -= chunk
+    return grid
+
+def top_activity_names(activities, start_day, end_day, limit=10):
+    totals = {}
+    for date_str in activities:
+        if not (start_day.isoformat() <= date_str <= end_day.isoformat()): continue
+        for act in activities[date_str]:
+            totals[act.get('name', '')] = totals.get(act.get('name', ''), 0) + act.get('duration_seconds', 0)
+    return sorted(totals.items(), key=lambda item: -item[1])[:limit]
+
+def downsample(labels, series, max_points):
+    # Sums adjacent buckets so a chart never has more bars than it has room for.
+    if max_points <= 0 or len(labels) <= max_points: return labels, series
+    step = -(-len(labels) // max_points)
+    merged = {name: [sum(values[i:i + step]) for i in range(0, len(values), step)] for name, values in series.items()}
+    return labels[::step], merged
+
+# ==============================================================================
+# Integrity check & repair
+# ==============================================================================
+DURATION_TOLERANCE_SECONDS = 60 # 'HH:MM' fields drop the seconds a timer-logged duration keeps
+CHECK_PROGRESS_EVERY = 500 # days
+CHECK_PROBLEM_LABELS = [('dropped_records', "unreadable records dropped"), ('duplicates', "duplicate records removed"),
+                        ('fixed_durations', "durations recomputed from start/end"), ('fixed_fields', "missing fields filled in"),
+                        ('added_categories', "unknown categories added"), ('empty_days', "empty days dropped"), ('bad_dates', "invalid dates dropped")]
+
+def _expected_duration(start, end):
+    minutes = (_time_to_minutes(end) - _time_to_minutes(start)) % (24 * 60)
+    return minutes * 60
+
+def _repair_activity(act, known_categories, stats):
+    # Returns a cleaned copy of the record, or None when it cannot be salvaged.
+    if not isinstance(act, dict): return None
+    try:
+        expected = _expected_duration(act['start'], act['end'])
+        datetime.strptime(act['start'], "%H:%M"); datetime.strptime(act['end'], "%H:%M")
+    except (KeyError, TypeError, ValueError, AttributeError):
+        return None
+    
+    repaired = dict(act)
+    if not isinstance(repaired.get('category'), str) or not repaired['category'].strip():
+        repaired['category'] = "Uncategorized"; stats['fixed_fields'] += 1
+    if not isinstance(repaired.get('name'), str):
+        repaired['name'] = "" if repaired.get('name') is None else str(repaired['name']); stats['fixed_fields'] += 1
+    if not isinstance(repaired.get('notes'), str):
+        repaired['notes'] = "" if repaired.get('notes') is None else str(repaired['notes']); stats['fixed_fields'] += 1
+    
+    duration = repaired.get('duration_seconds')
+    # 'HH:MM' can't tell how many midnights a session spans, so whole-day differences are accepted.
+    drift = (duration - expected) % 86400 if isinstance(duration, (int, float)) and not isinstance(duration, bool) and duration >= 0 else None
+    if drift is None or DURATION_TOLERANCE_SECONDS <= drift <= 86400 - DURATION_TOLERANCE_SECONDS:
+        repaired['duration_seconds'] = float(expected); stats['fixed_durations'] += 1
+    
+    if repaired['category'] not in known_categories:
+        known_categories.append(repaired['category']); stats['added_categories'] += 1
+    return repaired
+
+def check_and_repair(path, progress=None, dry_run=False):
+    # One linear pass over every day and record: validates, recomputes derived fields, drops empty
+    # days and exact duplicates, then rewrites the file in its own format (the original is kept as .bak).
+    # A file without problems is left alone.
+    categories, activities, settings = read_data_path(path, with_archives=False)
+    archived_days = {d for archive in load_archives(os.path.join(os.path.dirname(path), ARCHIVE_DIR)) for d in archive.day_keys()}
+    known_categories = []
+    for name in categories:
+        if isinstance(name, str) and name and name != 'All' and name not in known_categories: known_categories.append(name)
+    stats = {'days': 0, 'records': 0, 'dropped_records': 0, 'duplicates': 0, 'fixed_durations': 0, 'fixed_fields': 0,
+             'added_categories': 0, 'empty_days': 0, 'bad_dates': 0}
+    
+    date_keys = list(activities)
+    repaired_days = {}
+    for i, date_str in enumerate(date_keys, 1):
+        day_activities = activities[date_str]
+        try:
+            datetime.strptime(date_str, "%Y-%m-%d")
+        except (TypeError, ValueError):
+            stats['bad_dates'] += 1; continue
+        
+        stats['days'] += 1
+        if not isinstance(day_activities, list):
+            stats['dropped_records'] += 1; continue # The whole day is unreadable, not merely empty
+        seen, cleaned = set(), []
+        for act in day_activities:
+            stats['records'] += 1
+            repaired = _repair_activity(act, known_categories, stats)
+            if repaired is None: stats['dropped_records'] += 1; continue
+            identity = (repaired['category'], repaired['name'], repaired['start'], repaired['end'], round(repaired['duration_seconds']), repaired['notes'])
+            if identity in seen: stats['duplicates'] += 1; continue
+            seen.add(identity); cleaned.append(repaired)
+        
+        if cleaned or date_str in archived_days: repaired_days[date_str] = cleaned # Empty lists over archived days are deletions
+        else: stats['empty_days'] += 1
+        if progress and (i % CHECK_PROGRESS_EVERY == 0 or i == len(date_keys)): progress(i, len(date_keys))
+    
+    if not dry_run and any(stats[key] for key, _ in CHECK_PROBLEM_LABELS):
+        activities.detach() # Releases a snapshot mapping before the file is replaced
+        shutil.copy(path, path + ".bak")
+        if path.endswith(".stts"):
+            write_snapshot(path, known_categories, repaired_days, settings)
+        else:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump({'categories': known_categories, 'activities': repaired_days, 'settings': settings}, f, indent=4, ensure_ascii=False)
+    return stats
+
+def format_check_report(stats, dry_run=False):
+    lines = [f"Checked {stats['records']} records on {stats['days']} days."]
+    problems = [f"  {stats[key]} {label}" for key, label in CHECK_PROBLEM_LABELS if stats[key]]
+    lines += problems or ["  No problems found."]
+    if problems: lines.append("Dry run: nothing was written." if dry_run else "Repaired file written; the original was kept with a .bak extension.")
+    return "\n".join(lines)
 
 class CollapsibleFrame(ttk.Frame):
-    def __init__(self, parent, text="", bootstyle=DEFAULT, collapsed=True, *args, **kwargs):
+    def __init__(self, parent, text="", bootstyle=DEFAULT, collapsed=True, builder=None, *args, **kwargs):
         super().__init__(parent, *args, **kwargs)
         self.columnconfigure(1, weight=1)
         self.text = text
         self.bootstyle = bootstyle
+        self.builder = builder # Called with content_frame on first expand, so collapsed panels cost nothing at startup
+        self.is_built = builder is None
         
         self.header_frame = ttk.Frame(self, bootstyle=self.bootstyle)
         self.header_frame.grid(row=0, column=0, columnspan=2, sticky=EW)
@@ -54,14 +669,21 @@ class CollapsibleFrame(ttk.Frame):
         
         self.is_collapsed = collapsed
         if not self.is_collapsed:
+            self.build_content()
             self.content_frame.grid(row=1, column=0, columnspan=2, sticky=NSEW)
             self.toggle_button.configure(text="▼")
         else:
              self.toggle_button.configure(text="▶")
 
 
+    def build_content(self):
+        if self.is_built: return
+        self.is_built = True
+        self.builder(self.content_frame)
+
     def toggle(self, event=None):
         if self.is_collapsed:
+            self.build_content()
             self.content_frame.grid(row=1, column=0, columnspan=2, sticky=NSEW)
             self.toggle_button.configure(text="▼")
             self.is_collapsed = False
@@ -70,21 +692,375 @@ class CollapsibleFrame(ttk.Frame):
             self.toggle_button.configure(text="▶")
             self.is_collapsed = True
 
+# ==============================================================================
+# Auto-categorization
+# ==============================================================================
+RULE_KINDS = {"Keyword": "keyword", "Regex": "regex"}
+POMODORO_SUFFIX = " (Pomodoro)"
+
+def _normalize_name(name):
+    name = name.strip()
+    if name.endswith(POMODORO_SUFFIX): name = name[:-len(POMODORO_SUFFIX)].rstrip()
+    return name.casefold()
+
+def compile_rule(rule):
+    # Raises re.error for an unusable pattern.
+    pattern = re.escape(rule['pattern']) if rule['kind'] == "keyword" else rule['pattern']
+    return re.compile(pattern, re.IGNORECASE)
+
+def _trie_pattern(words):
+    # One regex for many literal keywords, factored by shared prefixes: the engine follows a single path
+    # per position instead of trying every keyword, and the optional tails make the longest keyword win.
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word: node = node.setdefault(char, {})
+        node[''] = True
+    def render(node):
+        branches = [re.escape(char) + render(child) for char, child in sorted(node.items()) if char]
+        if not branches: return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if '' in node else body
+    return render(trie)
+
+class CategoryMatcher:
+    # Suggests a category for an activity name. Exact names seen before win (most frequent category).
+    # Otherwise the rule matching earliest in the name wins; at the same position keywords go first
+    # (the longest one), then regex rules in list order. All keywords share one regex factored into a
+    # prefix trie. Regex rules are compiled on their own, so their groups and backreferences keep their
+    # meaning. Everything is compiled lazily and again only after the rules change; recent answers are
+    # cached per name.
+    CACHE_SIZE = 1024
+
+    def __init__(self, rules=None):
+        self.history = {} # normalized name -> {category: count}
+        self.set_rules(rules or [])
+
+    def set_rules(self, rules):
+        self.rules = list(rules)
+        self._compiled = None
+        self._keywords_ignorecase = None
+        self._keyword_categories = {}
+        self._regex_rules = [] # (rule index, compiled)
+        self._cache = OrderedDict()
+
+    def _compile(self):
+        for rule in self.rules:
+            if rule['kind'] == "keyword" and rule['pattern']:
+                self._keyword_categories.setdefault(rule['pattern'].lower(), rule['category']) # First listed wins
+        # Searched in the lower-cased name: a case-sensitive trie is several times faster than re.IGNORECASE.
+        self._compiled = re.compile(_trie_pattern(self._keyword_categories)) if self._keyword_categories else False
+        for index, rule in enumerate(self.rules):
+            if rule['kind'] != "regex": continue
+            try: self._regex_rules.append((index, compile_rule(rule)))
+            except re.error: continue # Skip a broken rule rather than losing all of them
+
+    def _match_rules(self, name):
+        if self._compiled is None: self._compile()
+        best = None # (start, rank, category); rank -1 for keywords, else the rule index
+        found = None
+        if self._compiled:
+            lowered = name.lower()
+            if len(lowered) == len(name): found = self._compiled.search(lowered)
+            else:
+                # lower() changed the length (e.g. 'İ'), so positions would no longer line up with the regex rules.
+                if self._keywords_ignorecase is None: self._keywords_ignorecase = re.compile(self._compiled.pattern, re.IGNORECASE)
+                found = self._keywords_ignorecase.search(name)
+        if found: best = (found.start(), -1, self._keyword_categories[found.group().lower()])
+        for index, compiled in self._regex_rules:
+            found = compiled.search(name)
+            if found and (best is None or (found.start(), index) < best[:2]): best = (found.start(), index, self.rules[index]['category'])
+        return best[2] if best else None
+
+    def learn(self, name, category, sign=1):
+        key = _normalize_name(name)
+        counts = self.history.setdefault(key, {})
+        counts[category] = counts.get(category, 0) + sign
+        if counts[category] <= 0:
+            del counts[category]
+            if not counts: del self.history[key]
+
+    def rebuild_history(self, name_categories):
+        self.history = {}
+        for name, category in name_categories: self.learn(name, category)
+
+    def match(self, name):
+        counts = self.history.get(_normalize_name(name))
+        if counts: return max(counts, key=counts.get)
+        if name in self._cache:
+            self._cache.move_to_end(name)
+            return self._cache[name]
+        category = self._cache[name] = self._match_rules(name)
+        if len(self._cache) > self.CACHE_SIZE: self._cache.popitem(last=False)
+        return category
+
+def read_activity_csv(path, matcher):
+    # Columns: date (YYYY-MM-DD), start, end (HH:MM), name, and optional category and notes.
+    # Rows without a category get the matcher's suggestion; rows that still have none are skipped.
+    imported, skipped = [], 0
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        for row in csv.DictReader(f):
+            row = {(key or '').strip().lower(): (value or '').strip() for key, value in row.items()}
+            name = row.get('name', '')
+            category = row.get('category') or matcher.match(name)
+            try:
+                day = datetime.strptime(row.get('date', ''), "%Y-%m-%d").date()
+                start_dt = datetime.combine(day, datetime.strptime(row.get('start', ''), "%H:%M").time())
+                end_dt = datetime.combine(day, datetime.strptime(row.get('end', ''), "%H:%M").time())
+            except ValueError:
+                skipped += 1; continue
+            if not name or not category:
+                skipped += 1; continue
+            if end_dt <= start_dt: end_dt += timedelta(days=1)
+            imported.append((day.strftime("%Y-%m-%d"), {'category': category, 'name': name, 'start': start_dt.strftime('%H:%M'), 'end': end_dt.strftime('%H:%M'),
+                                                         'duration_seconds': (end_dt - start_dt).total_seconds(), 'notes': row.get('notes', '')}))
+    return imported, skipped
+
+# ==============================================================================
+# Change events
+# ==============================================================================
+ActivityAdded = namedtuple("ActivityAdded", "date_str index activity")
+ActivityUpdated = namedtuple("ActivityUpdated", "date_str index previous activity")
+ActivityRemoved = namedtuple("ActivityRemoved", "date_str index activity")
+CategoryChanged = namedtuple("CategoryChanged", "name added")
+SettingChanged = namedtuple("SettingChanged", "key value")
+ACTIVITY_EVENTS = (ActivityAdded, ActivityUpdated, ActivityRemoved)
+ALL_EVENTS = ACTIVITY_EVENTS + (CategoryChanged, SettingChanged)
+
+class EventBus:
+    # Immediate handlers run inside emit() and keep derived state (caches, counters) exact. Batched
+    # handlers get every event of one event-loop turn in a single call, so views and persistence
+    # do their work once no matter how many mutations happened.
+    def __init__(self, schedule):
+        self._schedule = schedule
+        self._immediate, self._batched = {}, {}
+        self._pending = []
+        self._flush_scheduled = False
+
+    def subscribe(self, event_types, handler, batched=False):
+        registry = self._batched if batched else self._immediate
+        for event_type in event_types:
+            registry.setdefault(event_type, []).append(handler)
+
+    def emit(self, event):
+        for handler in self._immediate.get(type(event), ()): handler(event)
+        if type(event) in self._batched:
+            self._pending.append(event)
+            if not self._flush_scheduled:
+                self._flush_scheduled = True
+                self._schedule(self.flush)
+
+    def flush(self):
+        self._flush_scheduled = False
+        events, self._pending = self._pending, []
+        calls = OrderedDict()
+        for event in events:
+            for handler in self._batched[type(event)]: calls.setdefault(handler, []).append(event)
+        for handler, handler_events in calls.items(): handler(handler_events)
+
+class DayViewCache:
+    # Bounded LRU of prepared per-day view models, keyed by "YYYY-MM-DD".
+    def __init__(self, maxsize=DAY_VIEW_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        view = self._entries.get(key)
+        if view is not None: self._entries.move_to_end(key)
+        return view
+
+    def put(self, key, view):
+        self._entries[key] = view
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize: self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+class UndoHistory:
+    # Operations are (kind, date_str, index, activity_data) tuples holding the inverse of an applied
+    # change, so each step costs one record reference rather than a copy of the day or the whole store.
+    def __init__(self, depth=DEFAULT_UNDO_DEPTH):
+        # The depth comes from the settings file, so anything that isn't a positive number falls back to the default.
+        try: depth = int(depth)
+        except (TypeError, ValueError): depth = DEFAULT_UNDO_DEPTH
+        if depth < 1: depth = DEFAULT_UNDO_DEPTH
+        self.undo_stack = deque(maxlen=depth)
+        self.redo_stack = deque(maxlen=depth)
+
+    def record(self, inverse_op):
+        self.undo_stack.append(inverse_op)
+        self.redo_stack.clear()
+
+    def pop_undo(self):
+        return self.undo_stack.pop() if self.undo_stack else None
+
+    def pop_redo(self):
+        return self.redo_stack.pop() if self.redo_stack else None
+
+GOAL_PERIODS = {"day": "today", "week": "this week", "month": "this month"}
+
+class GoalTracker:
+    # Running per-period totals for categories that have goals. Counters are built with one scan
+    # and then adjusted by each added/removed activity, so progress checks are dictionary lookups.
+    def __init__(self, goals=None):
+        self.set_goals(goals or [])
+
+    def set_goals(self, goals):
+        self.goals = list(goals)
+        self._periods_by_category = {}
+        for goal in self.goals:
+            self._periods_by_category.setdefault(goal['category'], set()).add(goal['period'])
+        self.counters = {}
+        self.ready = False # Counters are only trustworthy after rebuild()
+
+    @staticmethod
+    def period_key(day, period):
+        if period == "week":
+            iso_year, iso_week, _ = day.isocalendar()
+            return f"{iso_year}-W{iso_week:02}"
+        if period == "month":
+            return day.strftime("%Y-%m")
+        return day.strftime("%Y-%m-%d")
+
+    def rebuild(self, activities):
+        self.counters = {}
+        if self._periods_by_category: # Without goals there is nothing to count, so the history isn't touched
+            for date_str, totals in iter_day_totals(activities):
+                for category, seconds in totals.items(): self._add(date_str, category, seconds)
+        self.ready = True
+
+    def apply(self, date_str, activity, sign):
+        self._add(date_str, activity.get('category'), sign * activity.get('duration_seconds', 0))
+
+    def _add(self, date_str, category, seconds):
+        periods = self._periods_by_category.get(category)
+        if not periods: return
+        day = datetime.strptime(date_str, "%Y-%m-%d").date()
+        for period in periods:
+            key = (category, period, self.period_key(day, period))
+            self.counters[key] = self.counters.get(key, 0) + seconds
+
+    def goals_for(self, category):
+        if not self.ready: return []
+        return [goal for goal in self.goals if goal['category'] == category]
+
+    def progress(self, goal, day, extra_seconds=0):
+        # Returns (tracked seconds, target seconds) for the goal's period containing `day`.
+        key = (goal['category'], goal['period'], self.period_key(day, goal['period']))
+        return self.counters.get(key, 0) + extra_seconds, goal['hours'] * 3600
+
+    @staticmethod
+    def is_crossed(goal, tracked, target):
+        # A target is reached at exactly its hours; a budget is only exceeded beyond them.
+        return tracked >= target if goal['kind'] == "min" else tracked > target
+
+    @staticmethod
+    def describe(goal):
+        relation = "≥" if goal['kind'] == "min" else "≤"
+        return f"{goal['category']} {relation} {goal['hours']:g}h/{goal['period']}"
+
+class IdleSource:
+    # Reports how long the user has been away from keyboard and mouse.
+    def idle_seconds(self):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+class X11IdleSource(IdleSource):
+    class _XScreenSaverInfo(ctypes.Structure):
+        _fields_ = [("window", ctypes.c_ulong), ("state", ctypes.c_int), ("kind", ctypes.c_int),
+                    ("til_or_since", ctypes.c_ulong), ("idle", ctypes.c_ulong), ("eventMask", ctypes.c_ulong)]
+
+    def __init__(self):
+        xlib_path, xss_path = ctypes.util.find_library("X11"), ctypes.util.find_library("Xss")
+        if not xlib_path or not xss_path: raise OSError("libX11/libXss not available")
+        self._xlib, self._xss = ctypes.cdll.LoadLibrary(xlib_path), ctypes.cdll.LoadLibrary(xss_path)
+        self._xlib.XOpenDisplay.restype = ctypes.c_void_p
+        self._xlib.XDefaultRootWindow.argtypes = [ctypes.c_void_p]
+        self._xlib.XDefaultRootWindow.restype = ctypes.c_ulong
+        self._xlib.XCloseDisplay.argtypes = [ctypes.c_void_p]
+        self._xss.XScreenSaverAllocInfo.restype = ctypes.POINTER(self._XScreenSaverInfo)
+        self._xss.XScreenSaverQueryInfo.argtypes = [ctypes.c_void_p, ctypes.c_ulong, ctypes.POINTER(self._XScreenSaverInfo)]
+        self._display = self._xlib.XOpenDisplay(None)
+        if not self._display: raise OSError("Cannot open X display")
+        self._info = self._xss.XScreenSaverAllocInfo()
+
+    def idle_seconds(self):
+        self._xss.XScreenSaverQueryInfo(self._display, self._xlib.XDefaultRootWindow(self._display), self._info)
+        return self._info.contents.idle / 1000
+
+    def close(self):
+        if self._display:
+            self._xlib.XCloseDisplay(self._display)
+            self._display = None
+
+class WindowsIdleSource(IdleSource):
+    class _LastInputInfo(ctypes.Structure):
+        _fields_ = [("cbSize", ctypes.c_uint), ("dwTime", ctypes.c_uint)]
+
+    def __init__(self):
+        self._user32, self._kernel32 = ctypes.windll.user32, ctypes.windll.kernel32
+        self._kernel32.GetTickCount.restype = ctypes.c_uint
+        self._info = self._LastInputInfo(cbSize=ctypes.sizeof(self._LastInputInfo))
+
+    def idle_seconds(self):
+        if not self._user32.GetLastInputInfo(ctypes.byref(self._info)): return 0
+        return ((self._kernel32.GetTickCount() - self._info.dwTime) & 0xFFFFFFFF) / 1000
+
+class TkInputIdleSource(IdleSource):
+    # Fallback that only sees input delivered to this application's windows.
+    def __init__(self, widget):
+        self.last_input = time.monotonic()
+        for sequence in ("<Any-KeyPress>", "<Motion>", "<Any-ButtonPress>", "<MouseWheel>"):
+            widget.bind_all(sequence, self._touch, add="+")
+
+    def _touch(self, event=None):
+        self.last_input = time.monotonic()
+
+    def idle_seconds(self):
+        return time.monotonic() - self.last_input
+
+def create_idle_source(widget):
+    try:
+        if sys.platform == "win32": return WindowsIdleSource()
+        if os.environ.get("DISPLAY"): return X11IdleSource()
+    except (OSError, AttributeError):
+        pass
+    return TkInputIdleSource(widget)
+
 class TimeTracker(bs.Window):
     @staticmethod
     def _load_initial_settings():
         try:
+            if os.path.exists(SNAPSHOT_FILE):
+                reader = SnapshotReader(SNAPSHOT_FILE)
+                reader.close()
+                return reader.meta.get('settings', {})
             with open(DATA_FILE, 'r', encoding='utf-8') as f:
                 data = json.load(f)
             return data.get('settings', {})
-        except (FileNotFoundError, json.JSONDecodeError):
+        except (FileNotFoundError, json.JSONDecodeError, ValueError, struct.error):
             return {}
 
     def __init__(self):
+        self.startup_started = time.perf_counter()
+        self.startup_timings = {}
         settings = TimeTracker._load_initial_settings()
         theme = settings.get("theme", "darkly")
 
         super().__init__(themename=theme)
+        self._mark_startup("window created")
         
         self.title("Simple Time Tracker")
         self.geometry(settings.get("window_geometry", "600x700"))
@@ -95,7 +1071,7 @@ class TimeTracker(bs.Window):
         self.timer_running = False
         self.start_time = None
         self.all_categories = {}
-        self.all_activities = {}
+        self.all_activities = ActivityStore()
         self.current_date = date.today()
         self.current_category_filter = "All"
         self.current_timer_category = None
@@ -105,24 +1081,82 @@ class TimeTracker(bs.Window):
         self.pomodoro_work_minutes = tk.IntVar(value=25)
         self.pomodoro_break_minutes = tk.IntVar(value=5)
         self.pomodoro_end_time = None
+        self.pomo_status_var = tk.StringVar(value="Status: Idle")
         
         self.after_id = None
         self.tree_item_to_activity_index = {}
+        self.category_bar_layout = None
+        self.pending_date = None
+        self.nav_after_id = None
+        self.prefetch_after_id = None
+        self.prefetch_queue = []
+        self.day_views = DayViewCache()
+        self.stats_cache = {}
+        self.bus = EventBus(self.after_idle)
+        self.bus.subscribe(ACTIVITY_EVENTS, self._on_activity_event)
+        self.bus.subscribe((SettingChanged,), self._on_setting_event)
+        self.bus.subscribe(ALL_EVENTS, self._refresh_views, batched=True)
+        self.bus.subscribe(ALL_EVENTS, lambda events: self.save_all_data(), batched=True)
+        self.history = UndoHistory(settings.get("undo_depth", DEFAULT_UNDO_DEPTH))
+        self.goal_tracker = GoalTracker(settings.get("goals", []))
+        self.notified_goals = set()
+        self.idle_threshold_minutes = settings.get("idle_threshold_minutes", 0) # 0 disables idle detection
+        self.idle_source = None
+        self.idle_started_at = None
+        self.idle_dialog = None
+        self.read_only = False # Set when the data file can't be loaded, so it is never overwritten
+        self.discarded_changes = False # A save was skipped because of read_only
+        self.category_matcher = CategoryMatcher(settings.get("category_rules", []))
+        self.auto_category = None # Last category picked by the matcher rather than by hand
 
         self._create_menu(settings)
         self._create_widgets()
         self._setup_styles()
+        self._mark_startup("widgets built")
         
         self.load_data(settings)
+        self._mark_startup("today's log shown")
         
         display_columns = settings.get('display_columns')
         if isinstance(display_columns, (list, tuple)) and all(c in self.columns_map for c in display_columns):
             self.activity_tree["displaycolumns"] = tuple(display_columns)
 
         self.protocol("WM_DELETE_WINDOW", self.on_closing)
+        self.idle_source = create_idle_source(self)
+        self.after(IDLE_POLL_MS, self.poll_idle)
         self.update_live_timer_display()
         self.bind_shortcuts()
         self.select_category_filter(self.current_category_filter)
+        # Only the timer and today's log are ready now; the rest waits until the window has painted.
+        self.bind("<Map>", self._on_first_map, add="+")
+
+    def _mark_startup(self, stage):
+        self.startup_timings[stage] = (time.perf_counter() - self.startup_started) * 1000
+
+    def _on_first_map(self, event):
+        if event.widget is not self or "first paint" in self.startup_timings: return
+        self.after_idle(self._on_first_paint)
+
+    def _on_first_paint(self):
+        if "first paint" in self.startup_timings: return
+        self._mark_startup("first paint")
+        self.after(1, self._finish_startup)
+
+    def _finish_startup(self):
+        # Deferred work: goal counters need a scan of the whole history (and decode every snapshot day).
+        self.goal_tracker.rebuild(self.all_activities)
+        self.category_matcher.rebuild_history(self.all_activities.live_name_categories())
+        self.update_category_buttons()
+        self._mark_startup("interactive")
+
+    def show_diagnostics(self):
+        lines = ["Startup (ms since launch):"]
+        lines += [f"  {stage}: {ms:.0f}" for stage, ms in self.startup_timings.items()]
+        lines += ["", f"Storage: {'compact snapshot' if self.compact_storage_var.get() else 'JSON'}",
+                  f"Cached day views: {len(self.day_views)}/{self.day_views.maxsize}",
+                  f"Undo steps: {len(self.history.undo_stack)}/{self.history.undo_stack.maxlen}",
+                  f"Idle source: {type(self.idle_source).__name__ if self.idle_source else 'none'}"]
+        messagebox.showinfo("Diagnostics", "\n".join(lines))
 
     def _create_menu(self, settings):
         menu_bar = tk.Menu(self)
@@ -132,12 +1166,35 @@ class TimeTracker(bs.Window):
         menu_bar.add_cascade(label="File", menu=file_menu)
         file_menu.add_command(label="Backup Data...", command=self.backup_data)
         file_menu.add_command(label="Restore from Backup...", command=self.restore_data)
+        file_menu.add_command(label="Import Activities (CSV)...", command=self.import_activities)
         file_menu.add_separator()
         file_menu.add_command(label="Exit", command=lambda: self.on_closing())
 
+        edit_menu = tk.Menu(menu_bar, tearoff=0)
+        menu_bar.add_cascade(label="Edit", menu=edit_menu)
+        edit_menu.add_command(label="Undo", accelerator="Ctrl+Z", command=self.undo)
+        edit_menu.add_command(label="Redo", accelerator="Ctrl+Y", command=self.redo)
+
+        tools_menu = tk.Menu(menu_bar, tearoff=0)
+        menu_bar.add_cascade(label="Tools", menu=tools_menu)
+        tools_menu.add_command(label="Statistics...", command=lambda: StatisticsWindow(self))
+        tools_menu.add_command(label="Goals...", command=lambda: GoalsWindow(self))
+        tools_menu.add_command(label="Category Rules...", command=lambda: CategoryRulesWindow(self))
+        tools_menu.add_command(label="Idle Detection...", command=self.configure_idle_detection)
+        tools_menu.add_separator()
+        tools_menu.add_command(label="Team Report...", command=lambda: TeamReportWindow(self))
+        tools_menu.add_command(label="Check & Repair Data...", command=self.check_data)
+        tools_menu.add_command(label="Archive Old Years...", command=self.archive_old_years)
+        tools_menu.add_separator()
+        tools_menu.add_command(label="Diagnostics...", command=self.show_diagnostics)
+
         view_menu = tk.Menu(menu_bar, tearoff=0)
         menu_bar.add_cascade(label="View", menu=view_menu)
         
+        self.compact_storage_var = tk.BooleanVar(value=os.path.exists(SNAPSHOT_FILE))
+        file_menu.insert_checkbutton(2, label="Use Compact Storage", variable=self.compact_storage_var, command=self.toggle_storage_format)
+        file_menu.insert_separator(2)
+
         self.theme_var = tk.StringVar(value=settings.get("theme", "darkly"))
         theme_submenu = tk.Menu(view_menu, tearoff=0)
         view_menu.add_cascade(label="Theme", menu=theme_submenu)
@@ -149,6 +1206,7 @@ class TimeTracker(bs.Window):
         self.style.theme_use(new_theme)
         self._setup_styles()
         self.canvas.config(background=self.style.colors.bg)
+        self.bus.emit(SettingChanged('theme', new_theme))
 
     def _create_widgets(self):
         container = ttk.Frame(self)
@@ -194,21 +1252,58 @@ class TimeTracker(bs.Window):
         ttk.Label(top_input_frame, text="What are you working on?").grid(row=0, column=1, sticky=W, padx=(10, 0))
         self.activity_name_entry = ttk.Entry(top_input_frame, font=("Helvetica", 12))
         self.activity_name_entry.grid(row=1, column=1, sticky=EW, padx=(10, 0), pady=(2, 0))
+        self.activity_name_entry.bind("<KeyRelease>", self.suggest_timer_category)
 
         self.timer_label = ttk.Label(timer_frame, text="00:00:00", font=("Segment7", 48), bootstyle="success")
         self.timer_label.pack(pady=5)
+        self.goal_label = ttk.Label(timer_frame, text="", font=("Helvetica", 10, "italic"))
+        self.goal_label.pack()
 
         self.start_stop_button = ttk.Button(timer_frame, text="Start", bootstyle="success", command=self.toggle_timer, width=15)
         self.start_stop_button.pack(pady=5)
         
-        self.pomo_collapsible_frame = CollapsibleFrame(main_frame, text="Pomodoro Timer", bootstyle=SECONDARY)
+        self.pomo_collapsible_frame = CollapsibleFrame(main_frame, text="Pomodoro Timer", bootstyle=SECONDARY, builder=self._build_pomodoro_panel)
         self.pomo_collapsible_frame.pack(fill=X, pady=10)
-        pomo_frame = self.pomo_collapsible_frame.content_frame
 
+        self.category_collapsible_frame = CollapsibleFrame(main_frame, text="Category Management", bootstyle=SECONDARY, builder=self._build_category_panel)
+        self.category_collapsible_frame.pack(fill=X, pady=10)
+
+        activities_section = ttk.LabelFrame(main_frame, text="Activities Log", padding=15)
+        activities_section.pack(fill=BOTH, expand=YES, pady=10)
+        activities_header = ttk.Frame(activities_section)
+        activities_header.pack(fill=X, pady=(0, 10))
+        ttk.Button(activities_header, text="Copy All", command=self.copy_all_activities, bootstyle="link").pack(side=LEFT)
+        ttk.Button(activities_header, text="+ Add Manually", command=self.open_manual_add_window, bootstyle="info-link").pack(side=LEFT, padx=10)
+        ttk.Button(activities_header, text="Export to TXT", command=self.export_to_txt, bootstyle="success-link").pack(side=LEFT, padx=10)
+        total_time_frame = ttk.Frame(activities_header)
+        total_time_frame.pack(side=RIGHT)
+        self.total_time_label = ttk.Label(total_time_frame, text="0s", font=("Helvetica", 12, "bold"), bootstyle="primary", cursor="hand2")
+        self.total_time_label.pack(side=RIGHT)
+        self.total_time_text_label = ttk.Label(total_time_frame, text="Total Time: ", cursor="hand2")
+        self.total_time_text_label.pack(side=RIGHT)
+        total_time_frame.bind("<Button-1>", self.copy_category_total_time)
+        self.total_time_label.bind("<Button-1>", self.copy_category_total_time)
+        self.total_time_text_label.bind("<Button-1>", self.copy_category_total_time)
+        
+        tree_container = ttk.Frame(activities_section)
+        tree_container.pack(fill=BOTH, expand=YES)
+
+        self.columns_map = {"time": "Time Range", "activity": "Activity", "duration": "Duration", "copy": "Copy"}
+        self.activity_tree = ttk.Treeview(tree_container, columns=list(self.columns_map.keys()), show="headings", height=10)
+
+        x_scrollbar = ttk.Scrollbar(tree_container, orient=HORIZONTAL, command=self.activity_tree.xview)
+        self.activity_tree.configure(xscrollcommand=x_scrollbar.set)
+        
+        x_scrollbar.pack(side=BOTTOM, fill=X)
+        self.activity_tree.pack(side=LEFT, fill=BOTH, expand=YES)
+        
+        self.setup_activity_tree()
+
+    def _build_pomodoro_panel(self, pomo_frame):
         pomo_top_frame = ttk.Frame(pomo_frame)
         pomo_top_frame.pack(fill=X, expand=YES, pady=5)
         ttk.Checkbutton(pomo_top_frame, text="Enable Pomodoro Mode", variable=self.pomodoro_mode_on, bootstyle="round-toggle", command=self.on_pomodoro_toggle).pack(side=LEFT)
-        self.pomo_status_label = ttk.Label(pomo_top_frame, text="Status: Idle", font=("Helvetica", 10, "italic"))
+        self.pomo_status_label = ttk.Label(pomo_top_frame, textvariable=self.pomo_status_var, font=("Helvetica", 10, "italic"))
         self.pomo_status_label.pack(side=RIGHT)
         pomo_settings_frame = ttk.Frame(pomo_frame)
         pomo_settings_frame.pack(fill=X, expand=YES, pady=5)
@@ -219,10 +1314,7 @@ class TimeTracker(bs.Window):
         self.pomo_break_spinbox = ttk.Spinbox(pomo_settings_frame, from_=1, to=60, textvariable=self.pomodoro_break_minutes, width=5)
         self.pomo_break_spinbox.pack(side=LEFT)
 
-        self.category_collapsible_frame = CollapsibleFrame(main_frame, text="Category Management", bootstyle=SECONDARY)
-        self.category_collapsible_frame.pack(fill=X, pady=10)
-        category_section = self.category_collapsible_frame.content_frame
-
+    def _build_category_panel(self, category_section):
         add_cat_frame = ttk.Frame(category_section)
         add_cat_frame.pack(fill=X, pady=(10, 10))
         self.category_entry = ttk.Entry(add_cat_frame, bootstyle="info", width=20)
@@ -245,37 +1337,15 @@ class TimeTracker(bs.Window):
         ttk.Button(add_cat_frame, text="Add", command=self.add_category, bootstyle="info").pack(side=LEFT)
         self.category_buttons_frame = ttk.Frame(category_section)
         self.category_buttons_frame.pack(fill=X, pady=5)
-
-        activities_section = ttk.LabelFrame(main_frame, text="Activities Log", padding=15)
-        activities_section.pack(fill=BOTH, expand=YES, pady=10)
-        activities_header = ttk.Frame(activities_section)
-        activities_header.pack(fill=X, pady=(0, 10))
-        ttk.Button(activities_header, text="Copy All", command=self.copy_all_activities, bootstyle="link").pack(side=LEFT)
-        ttk.Button(activities_header, text="+ Add Manually", command=self.open_manual_add_window, bootstyle="info-link").pack(side=LEFT, padx=10)
-        ttk.Button(activities_header, text="Export to TXT", command=self.export_to_txt, bootstyle="success-link").pack(side=LEFT, padx=10)
-        total_time_frame = ttk.Frame(activities_header)
-        total_time_frame.pack(side=RIGHT)
-        self.total_time_label = ttk.Label(total_time_frame, text="0s", font=("Helvetica", 12, "bold"), bootstyle="primary", cursor="hand2")
-        self.total_time_label.pack(side=RIGHT)
-        self.total_time_text_label = ttk.Label(total_time_frame, text="Total Time: ", cursor="hand2")
-        self.total_time_text_label.pack(side=RIGHT)
-        total_time_frame.bind("<Button-1>", self.copy_category_total_time)
-        self.total_time_label.bind("<Button-1>", self.copy_category_total_time)
-        self.total_time_text_label.bind("<Button-1>", self.copy_category_total_time)
-        
-        tree_container = ttk.Frame(activities_section)
-        tree_container.pack(fill=BOTH, expand=YES)
-
-        self.columns_map = {"time": "Time Range", "activity": "Activity", "duration": "Duration", "copy": "Copy"}
-        self.activity_tree = ttk.Treeview(tree_container, columns=list(self.columns_map.keys()), show="headings", height=10)
-
-        x_scrollbar = ttk.Scrollbar(tree_container, orient=HORIZONTAL, command=self.activity_tree.xview)
-        self.activity_tree.configure(xscrollcommand=x_scrollbar.set)
-        
-        x_scrollbar.pack(side=BOTTOM, fill=X)
-        self.activity_tree.pack(side=LEFT, fill=BOTH, expand=YES)
+        # Button frames are children of category_buttons_frame and get packed/gridded into
+        # one of these two containers, so moving a button to the overflow list never recreates it.
+        self.category_bar_frame = ttk.Frame(self.category_buttons_frame)
+        self.category_bar_frame.pack(fill=X)
+        self.category_overflow_frame = CollapsibleFrame(self.category_buttons_frame, text="More categories", bootstyle=SECONDARY)
         
-        self.setup_activity_tree()
+        for name in self.all_categories: self._create_category_widgets(name)
+        self._layout_category_buttons()
+        self.update_category_buttons()
 
     def _setup_styles(self):
         theme_name = self.style.theme.name
@@ -321,60 +1391,171 @@ class TimeTracker(bs.Window):
         else:
             self.bracket_style = "square"
         self._update_bracket_button_display()
-        self.display_data_for_date(self.current_date)
+        self.bus.emit(SettingChanged('bracket_style', self.bracket_style))
 
     def on_closing(self):
         if self.timer_running:
             if not messagebox.askokcancel("Timer Running", "A timer is running. Are you sure you want to quit?"):
                 return
-            self.force_stop_timer()
+            self.force_stop_timer(ask_idle=False)
+        self.bus.flush() # Changes from this turn (e.g. the stopped session) count as unsaved below
         
+        if self.read_only and self.discarded_changes:
+            if not messagebox.askokcancel("Changes Not Saved", "The data file could not be loaded, so this session is read-only.\nChanges made since the app started will be lost.\n\nQuit anyway?"):
+                return
         self.save_all_data()
+        if self.idle_source: self.idle_source.close()
         self.destroy()
         
     def save_all_data(self):
+        if self.read_only: # The data file could not be loaded; saving would overwrite it with nothing
+            self.discarded_changes = True
+            return
+        categories = [name for name in self.all_categories if name != 'All']
+        settings = self._collect_settings()
+        if self.compact_storage_var.get():
+            self.all_activities.save_snapshot(SNAPSHOT_FILE, categories, settings)
+            stale_file = DATA_FILE
+        else:
+            self._write_json(DATA_FILE, categories, settings, live_only=True)
+            self.all_activities.detach()
+            stale_file = SNAPSHOT_FILE
+        # Exactly one live data file: drop the other format once the new one is safely written.
+        if os.path.exists(stale_file): os.remove(stale_file)
+
+    def _write_json(self, path, categories=None, settings=None, live_only=False):
+        # Backups (live_only=False) also include archived years so they can be restored on their own.
         data_to_save = {
-            'categories': [name for name in self.all_categories if name != 'All'], 
-            'activities': self.all_activities,
-            'settings': {
-                'theme': self.style.theme.name,
-                'window_geometry': self.geometry(),
-                'display_columns': self._get_current_display_columns(),
-                'bracket_style': self.bracket_style,
-            }
+            'categories': categories if categories is not None else [name for name in self.all_categories if name != 'All'],
+            'activities': self.all_activities.live_dict() if live_only else self.all_activities.to_dict(),
+            'settings': settings if settings is not None else self._collect_settings(),
         }
-        with open(DATA_FILE, 'w', encoding='utf-8') as f:
+        with open(path, 'w', encoding='utf-8') as f:
             json.dump(data_to_save, f, indent=4, ensure_ascii=False)
 
+    def toggle_storage_format(self):
+        if self.read_only:
+            self.compact_storage_var.set(not self.compact_storage_var.get())
+            messagebox.showwarning("Read-Only Session", "The data file could not be loaded, so the storage format can't be changed in this session."); return
+        self.save_all_data()
+        new_format = "compact snapshot" if self.compact_storage_var.get() else "JSON"
+        ToastNotification(title="Storage Format Changed", message=f"Data is now stored as {new_format}.", duration=2000, bootstyle=INFO).show_toast()
+
+    def _collect_settings(self):
+        return {
+            'theme': self.style.theme.name,
+            'window_geometry': self.geometry(),
+            'display_columns': self._get_current_display_columns(),
+            'bracket_style': self.bracket_style,
+            'undo_depth': self.history.undo_stack.maxlen,
+            'goals': self.goal_tracker.goals,
+            'idle_threshold_minutes': self.idle_threshold_minutes,
+            'category_rules': self.category_matcher.rules,
+        }
+
     def load_data(self, settings):
         self._create_category_button('All', allow_delete=False)
-        if not os.path.exists(DATA_FILE):
+        if not os.path.exists(DATA_FILE) and not os.path.exists(SNAPSHOT_FILE):
             default_cats = ["学习", "工作", "个人", "午休"]
             for cat in default_cats:
                 self._create_category_button(cat)
             self.save_all_data()
         else:
             try:
-                with open(DATA_FILE, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
+                categories, self.all_activities, _ = read_data_file()
                 
-                for name in data.get('categories', []):
+                for name in categories:
                     if name not in self.all_categories:
                         self._create_category_button(name)
-                self.all_activities = data.get('activities', {})
                 
-            except (json.JSONDecodeError, KeyError) as e:
-                messagebox.showerror("Load Error", f"Could not load data file. It might be corrupted. Error: {e}")
+            except (json.JSONDecodeError, KeyError, ValueError, struct.error) as e:
+                self.read_only = True
+                data_path = SNAPSHOT_FILE if os.path.exists(SNAPSHOT_FILE) else DATA_FILE
+                kept_path = f"{data_path}.unreadable-{datetime.now().strftime('%Y%m%d%H%M%S')}"
+                try:
+                    shutil.copy2(data_path, kept_path)
+                    kept_note = f"A copy was kept as {kept_path}."
+                except OSError as copy_error:
+                    kept_note = f"A copy could not be made ({copy_error})."
+                messagebox.showerror("Load Error", f"Could not load data file. It might be corrupted or written by a newer version. Error: {e}\n\n"
+                                     f"Nothing will be saved in this session, so the file is left untouched. {kept_note}")
         
+        self._layout_category_buttons()
         self.update_timer_category_menu()
         self.go_to_today()
 
+    def check_data(self):
+        if self.timer_running: messagebox.showwarning("Timer Running", "Please stop the timer before checking the data file."); return
+        if not messagebox.askokcancel("Check & Repair Data", "Validate every record and rewrite the data file with any problems fixed?\nThe current file is kept as a .bak copy."): return
+        self.save_all_data()
+        self.all_activities.detach() # The checker may replace the file, which can't happen while it is mapped
+        path = SNAPSHOT_FILE if self.compact_storage_var.get() else DATA_FILE
+        
+        # The pass runs in a helper thread; the progress window (which also blocks edits) polls it with after().
+        progress_window = tk.Toplevel(self); progress_window.title("Checking Data"); progress_window.transient(self); progress_window.grab_set()
+        progress_window.protocol("WM_DELETE_WINDOW", lambda: None)
+        progress_bar = ttk.Progressbar(progress_window, length=300, maximum=1, bootstyle="info-striped"); progress_bar.pack(padx=20, pady=20)
+        state = {'progress': (0, 1), 'stats': None, 'error': None}
+        def run_check():
+            try: state['stats'] = check_and_repair(path, lambda done, total: state.__setitem__('progress', (done, total)))
+            except Exception as e: state['error'] = e
+        worker = threading.Thread(target=run_check, daemon=True)
+        def check_done():
+            done, total = state['progress']
+            progress_bar.config(maximum=total, value=done)
+            if worker.is_alive(): self.after(100, check_done); return
+            progress_window.destroy()
+            if state['error'] is not None:
+                messagebox.showerror("Check Error", f"Failed to check the data file.\nError: {state['error']}"); return
+            if any(state['stats'][key] for key, _ in CHECK_PROBLEM_LABELS): self.reload_data()
+            messagebox.showinfo("Check Complete", format_check_report(state['stats']))
+        worker.start()
+        self.after(100, check_done)
+
+    def archive_old_years(self):
+        this_year = date.today().year
+        if not messagebox.askokcancel("Archive Old Years", f"Move all activities from before {this_year} into compressed archive files in '{ARCHIVE_DIR}'?\n\nThey stay visible, searchable and included in reports, but are no longer loaded or rewritten every time the app starts or saves."): return
+        try:
+            moved = archive_days_before(self.all_activities, ARCHIVE_DIR, this_year)
+            self.save_all_data()
+        except Exception as e:
+            messagebox.showerror("Archive Error", f"Failed to archive old activities.\nError: {e}"); return
+        ToastNotification(title="Archive Complete", message=f"{moved} days moved to the archive.", duration=3000, bootstyle=SUCCESS).show_toast()
+
+    def reload_data(self):
+        categories, self.all_activities, _ = read_data_file()
+        for name in categories:
+            if name not in self.all_categories: self._create_category_button(name)
+        self._layout_category_buttons()
+        self.update_timer_category_menu()
+        # Record positions may have shifted, so cached views and undo steps no longer apply.
+        self.day_views.clear(); self.stats_cache.clear()
+        self.history.undo_stack.clear(); self.history.redo_stack.clear()
+        self.goal_tracker.rebuild(self.all_activities)
+        self.category_matcher.rebuild_history(self.all_activities.live_name_categories())
+        self.display_data_for_date(self.current_date)
+
+    def import_activities(self):
+        import_path = filedialog.askopenfilename(title="Import Activities", filetypes=[("CSV Files", "*.csv"), ("All Files", "*.*")])
+        if not import_path: return
+        try:
+            imported, skipped = read_activity_csv(import_path, self.category_matcher)
+        except (OSError, UnicodeDecodeError, csv.Error) as e:
+            messagebox.showerror("Import Error", f"Could not read the CSV file.\nError: {e}"); return
+        for date_str, activity_data in imported:
+            if activity_data['category'] not in self.all_categories:
+                self._create_category_button(activity_data['category'])
+                self.bus.emit(CategoryChanged(activity_data['category'], True))
+            # Not recorded as undo steps: one import would push everything else out of the history.
+            self._apply_operation(('insert', date_str, len(self.all_activities.get(date_str, [])), activity_data))
+        ToastNotification(title="Import Complete", message=f"{len(imported)} activities imported, {skipped} rows skipped.", duration=3000, bootstyle=SUCCESS).show_toast()
+
     def backup_data(self):
-        if not os.path.exists(DATA_FILE):
+        if not os.path.exists(DATA_FILE) and not os.path.exists(SNAPSHOT_FILE):
             messagebox.showwarning("No Data", "There is no data file to back up.")
             return
 
-        initial_filename = f"time_tracker_backup_{date.today().strftime('%Y%m%d')}.json"
+        initial_filename = f"{BACKUP_PREFIX}{date.today().strftime('%Y%m%d')}.json"
         backup_path = filedialog.asksaveasfilename(
             title="Save Backup As",
             initialfile=initial_filename,
@@ -385,7 +1566,7 @@ class TimeTracker(bs.Window):
         if backup_path:
             try:
                 self.save_all_data()
-                shutil.copy(DATA_FILE, backup_path)
+                self._write_json(backup_path) # Backups are always plain JSON, whatever the storage format
                 ToastNotification(title="Backup Successful", message=f"Data backed up to {os.path.basename(backup_path)}", bootstyle=SUCCESS).show_toast()
             except Exception as e:
                 messagebox.showerror("Backup Error", f"Failed to create backup.\nError: {e}")
@@ -401,7 +1582,9 @@ class TimeTracker(bs.Window):
                 with open(backup_path, 'r', encoding='utf-8') as f:
                     json.load(f)
                 
+                self.all_activities.detach()
                 shutil.copy(backup_path, DATA_FILE)
+                if os.path.exists(SNAPSHOT_FILE): os.remove(SNAPSHOT_FILE)
                 
                 messagebox.showinfo("Restore Successful", "Data has been restored.\nPlease restart the application for the changes to take effect.")
                 self.destroy()
@@ -419,8 +1602,15 @@ class TimeTracker(bs.Window):
 
     def bind_shortcuts(self):
         self.bind("<Control-s>", lambda event: self.toggle_timer()); self.bind("<Control-S>", lambda event: self.toggle_timer())
-        self.bind("<Control-n>", lambda event: self.category_entry.focus_set()); self.bind("<Control-N>", lambda event: self.category_entry.focus_set())
+        self.bind("<Control-n>", lambda event: self.focus_category_entry()); self.bind("<Control-N>", lambda event: self.focus_category_entry())
         self.bind("<Control-m>", lambda event: self.open_manual_add_window()); self.bind("<Control-M>", lambda event: self.open_manual_add_window())
+        self.bind("<Alt-Left>", lambda event: self.prev_day()); self.bind("<Alt-Right>", lambda event: self.next_day())
+        self.bind("<Control-z>", lambda event: self._history_shortcut(self.undo)); self.bind("<Control-Z>", lambda event: self._history_shortcut(self.undo))
+        self.bind("<Control-y>", lambda event: self._history_shortcut(self.redo)); self.bind("<Control-Y>", lambda event: self._history_shortcut(self.redo))
+
+    def focus_category_entry(self):
+        if self.category_collapsible_frame.is_collapsed: self.category_collapsible_frame.toggle()
+        self.category_entry.focus_set()
 
     def on_pomodoro_toggle(self):
         if self.timer_running: self.force_stop_timer()
@@ -448,32 +1638,89 @@ class TimeTracker(bs.Window):
             messagebox.showerror("Invalid Format", "Please enter the date in YYYY-MM-DD format.")
 
     def change_day(self, days_delta):
-        self.current_date += timedelta(days=days_delta)
-        self.display_data_for_date(self.current_date)
+        # Rapid clicks or key repeat only move the target; the render runs once the event queue is idle.
+        self.pending_date = (self.pending_date or self.current_date) + timedelta(days=days_delta)
+        self.date_var.set(self.pending_date.strftime("%Y-%m-%d"))
+        if self.nav_after_id is None:
+            self.nav_after_id = self.after_idle(self._render_pending_date)
+
+    def _render_pending_date(self):
+        self.nav_after_id = None
+        if self.pending_date is not None: self.display_data_for_date(self.pending_date)
 
     def prev_day(self): self.change_day(-1)
     def next_day(self): self.change_day(1)
     def go_to_today(self): self.display_data_for_date(date.today())
     
     def display_data_for_date(self, target_date):
+        if self.nav_after_id:
+            self.after_cancel(self.nav_after_id)
+            self.nav_after_id = None
+        self.pending_date = None
         self.current_date = target_date
         self.date_var.set(self.current_date.strftime("%Y-%m-%d"))
         date_str = self.current_date.strftime("%Y-%m-%d")
-        activities_for_day = self.all_activities.get(date_str, [])
-        self.recalculate_totals_for_day(activities_for_day)
-        self._populate_activities_tree(activities_for_day, self.current_category_filter)
+        self.recalculate_totals_for_day(date_str)
+        self._populate_activities_tree(date_str, self.current_category_filter)
         self.update_total_time_display()
+        self._schedule_prefetch()
 
-    def recalculate_totals_for_day(self, activities):
+    def recalculate_totals_for_day(self, date_str):
         for cat_data in self.all_categories.values(): cat_data['total'] = timedelta(0)
-        for activity in activities:
-            duration = timedelta(seconds=activity.get('duration_seconds', 0))
-            category = activity.get('category')
+        for category, seconds in self._get_day_view(date_str)['totals'].items():
+            duration = timedelta(seconds=seconds)
             if category in self.all_categories and category != "All": 
                 self.all_categories[category]['total'] += duration
             self.all_categories['All']['total'] += duration
         self.update_category_buttons()
 
+    def _get_day_view(self, date_str):
+        view = self.day_views.get(date_str)
+        if view is None:
+            view = self._build_day_view(date_str)
+            self.day_views.put(date_str, view)
+        return view
+
+    def _build_day_view(self, date_str):
+        # Everything _populate_activities_tree and the totals need, preformatted so a revisit is just a widget fill.
+        activities = self.all_activities.get(date_str, [])
+        columns = self.activity_tree["columns"]
+        prefix, suffix = ("[", "]") if self.bracket_style == "square" else ("【", "】")
+        totals, rows = summarize_day(activities), []
+
+        for original_index, activity in sorted(enumerate(activities), key=lambda x: datetime.strptime(x[1]['start'], '%H:%M')):
+            note_icon = " 📝" if activity.get("notes") else ""
+            values_map = {
+                "time": f"{activity['start']} - {activity['end']}",
+                "activity": f"{prefix}{activity['category']}{suffix} {activity['name']}{note_icon}",
+                "duration": self.format_timedelta_hms(timedelta(seconds=activity['duration_seconds'])),
+                "copy": "📋",
+            }
+            rows.append({
+                'index': original_index,
+                'category': activity['category'],
+                'values': tuple(values_map[col_id] for col_id in columns),
+                'notes': activity.get("notes", ""),
+            })
+        return {'rows': rows, 'totals': totals}
+
+    def invalidate_day(self, date_str):
+        self.day_views.invalidate(date_str)
+
+    def _schedule_prefetch(self):
+        window = [(self.current_date + timedelta(days=offset)).strftime("%Y-%m-%d") for offset in range(-PREFETCH_RADIUS, PREFETCH_RADIUS + 1)]
+        # Nearest neighbours first, one day per idle callback so navigation input is never blocked.
+        self.prefetch_queue = sorted((d for d in window if d not in self.day_views), key=lambda d: abs(window.index(d) - PREFETCH_RADIUS))
+        if self.prefetch_after_id is None and self.prefetch_queue:
+            self.prefetch_after_id = self.after_idle(self._prefetch_next_day)
+
+    def _prefetch_next_day(self):
+        self.prefetch_after_id = None
+        if not self.prefetch_queue: return
+        self._get_day_view(self.prefetch_queue.pop(0))
+        if self.prefetch_queue:
+            self.prefetch_after_id = self.after(10, self._prefetch_next_day)
+
     def add_category(self):
         new_cat_name = self.category_entry.get().strip()
         if not new_cat_name or new_cat_name == "Add a new category":
@@ -485,45 +1732,81 @@ class TimeTracker(bs.Window):
 
         self.all_categories[new_cat_name] = {'total': timedelta(0)}
         self._create_category_button(new_cat_name)
-        self.update_timer_category_menu()
         self.category_entry.delete(0, END)
         self.set_placeholder(None)
-        self.save_all_data()
+        self.bus.emit(CategoryChanged(new_cat_name, True))
     
     def _create_category_button(self, name, allow_delete=True):
-        if 'frame' in self.all_categories.get(name, {}): return
+        if name not in self.all_categories:
+            self.all_categories[name] = {'total': timedelta(0)}
+        self.all_categories[name].setdefault('allow_delete', allow_delete)
+        # Widgets only exist once the Category Management panel has been expanded.
+        if self.category_collapsible_frame.is_built: self._create_category_widgets(name)
+
+    def _create_category_widgets(self, name):
+        if 'frame' in self.all_categories[name]: return
         
         button_frame = ttk.Frame(self.category_buttons_frame)
-        button_frame.pack(side=LEFT, padx=3, pady=3, anchor='nw') 
         
         button = ttk.Button(button_frame, text=f"{name} 0s", bootstyle="secondary-outline",
                             command=lambda n=name: self.select_category_filter(n))
         button.pack(side=LEFT, fill=X, expand=YES)
 
-        if allow_delete:
+        if self.all_categories[name].get('allow_delete', True):
             delete_button = ttk.Button(button_frame, text="X", bootstyle="danger-link", width=2, command=lambda n=name: self.delete_category(n))
             delete_button.pack(side=LEFT)
             
-        if name not in self.all_categories:
-            self.all_categories[name] = {'total': timedelta(0)}
-            
         self.all_categories[name]['button'] = button
         self.all_categories[name]['frame'] = button_frame
+        self.all_categories[name]['rendered_text'] = f"{name} 0s"
+        self.all_categories[name]['rendered_style'] = "secondary-outline"
+        self.all_categories[name]['rendered_total'] = None
+
+    def _layout_category_buttons(self):
+        if not self.category_collapsible_frame.is_built: return
+        names = [name for name, data in self.all_categories.items() if 'frame' in data]
+        layout = (tuple(names[:CATEGORY_BAR_LIMIT]), tuple(names[CATEGORY_BAR_LIMIT:]))
+        if layout == self.category_bar_layout: return
+        self.category_bar_layout = layout
+        
+        visible, overflow = layout
+        for name in names:
+            frame = self.all_categories[name]['frame']
+            frame.pack_forget(); frame.grid_forget()
+        for name in visible:
+            self.all_categories[name]['frame'].pack(in_=self.category_bar_frame, side=LEFT, padx=3, pady=3, anchor='nw')
+        for i, name in enumerate(overflow):
+            row, column = divmod(i, CATEGORY_OVERFLOW_COLUMNS)
+            self.all_categories[name]['frame'].grid(in_=self.category_overflow_frame.content_frame, row=row, column=column, padx=3, pady=3, sticky=W)
+        
+        if overflow:
+            self.category_overflow_frame.header_label.config(text=f"More categories ({len(overflow)})")
+            if not self.category_overflow_frame.winfo_manager(): self.category_overflow_frame.pack(fill=X, pady=(5, 0))
+        else:
+            self.category_overflow_frame.pack_forget()
+
+    def _render_category_button(self, data, text=None, bootstyle=None):
+        # Only touch the widget when the rendered value actually changes; ttkbootstrap restyling is expensive.
+        if 'button' not in data: return
+        if text is not None and text != data.get('rendered_text'):
+            data['button'].config(text=text)
+            data['rendered_text'] = text
+        if bootstyle is not None and bootstyle != data.get('rendered_style'):
+            data['button'].config(bootstyle=bootstyle)
+            data['rendered_style'] = bootstyle
 
 
     def delete_category(self, name):
         if name == 'All' or name not in self.all_categories: return
         if self.timer_running and self.current_timer_category == name: messagebox.showwarning("Warning", "Cannot delete the currently active category."); return
         
-        has_activities = any(act['category'] == name for day_activities in self.all_activities.values() for act in day_activities)
+        has_activities = any(name in totals for _, totals in iter_day_totals(self.all_activities))
         if has_activities: messagebox.showwarning("Warning", f"Cannot delete category '{name}' because it has recorded activities. Please re-assign or delete those activities first."); return
         
         if messagebox.askokcancel("Confirm Delete", f"Are you sure you want to permanently delete the '{name}' category?"):
             self.all_categories[name]['frame'].destroy()
             del self.all_categories[name]
-            self.update_timer_category_menu()
-            if self.current_category_filter == name: self.select_category_filter('All')
-            self.save_all_data()
+            self.bus.emit(CategoryChanged(name, False))
 
     def select_category_filter(self, name):
         self.current_category_filter = name
@@ -532,15 +1815,28 @@ class TimeTracker(bs.Window):
         self.update_category_button_styles()
 
         date_str = self.current_date.strftime("%Y-%m-%d")
-        activities_for_day = self.all_activities.get(date_str, [])
-        self._populate_activities_tree(activities_for_day, self.current_category_filter)
+        self._populate_activities_tree(date_str, self.current_category_filter)
         self.update_total_time_display()
 
     def on_timer_category_select(self, event=None):
         selected_cat = self.timer_category_var.get()
         if self.timer_running:
             self.current_timer_category = selected_cat if selected_cat != "All" else None
+            self.notified_goals = self._crossed_goals()
         self.select_category_filter(selected_cat)
+
+    def suggest_timer_category(self, event=None):
+        if self.timer_running: return
+        name = self.activity_name_entry.get().strip()
+        if not name or self.timer_category_var.get() not in ("", "All", self.auto_category): return # Picked by hand
+        suggestion = self.category_matcher.match(name)
+        if suggestion in self.all_categories and suggestion != 'All':
+            self.timer_category_var.set(suggestion)
+            self.auto_category = suggestion
+
+    def set_category_rules(self, rules):
+        self.category_matcher.set_rules(rules)
+        self.bus.emit(SettingChanged('category_rules', rules))
         
     def update_category_button_styles(self):
         active_filter = self.current_category_filter
@@ -549,19 +1845,145 @@ class TimeTracker(bs.Window):
             if 'button' not in data: continue
             
             if self.timer_running and name == self.current_timer_category:
-                data['button'].config(bootstyle="info")
+                bootstyle = "info"
             elif name == active_filter:
-                data['button'].config(bootstyle="success")
+                bootstyle = "success"
             else:
-                data['button'].config(bootstyle="secondary-outline")
+                bootstyle = "secondary-outline"
+            self._render_category_button(data, bootstyle=bootstyle)
 
 
     def log_activity(self, category, name, start, end, duration, date_to_log, notes=""):
         activity_data = {'category': category, 'name': name, 'start': start.strftime('%H:%M'), 'end': end.strftime('%H:%M'), 'duration_seconds': duration.total_seconds(), 'notes': notes}
         date_str = date_to_log.strftime("%Y-%m-%d")
-        if date_str not in self.all_activities: self.all_activities[date_str] = []
-        self.all_activities[date_str].append(activity_data)
-        self.display_data_for_date(date_to_log)
+        self.apply_activity_change(('insert', date_str, len(self.all_activities.get(date_str, [])), activity_data))
+
+    def apply_activity_change(self, op):
+        self.history.record(self._apply_operation(op))
+
+    def _history_shortcut(self, action):
+        # While typing, Ctrl+Z/Y belong to the text field, not to the activity history.
+        if isinstance(self.focus_get(), (tk.Entry, tk.Text)): return
+        action()
+
+    def undo(self):
+        op = self.history.pop_undo()
+        if op is None: self.bell(); return
+        self.history.redo_stack.append(self._apply_operation(op))
+        self._reveal_date(op[1])
+
+    def redo(self):
+        op = self.history.pop_redo()
+        if op is None: self.bell(); return
+        self.history.undo_stack.append(self._apply_operation(op))
+        self._reveal_date(op[1])
+
+    def _apply_operation(self, op):
+        # Applies an insert/remove/replace on one day's list and returns the operation that reverts it.
+        kind, date_str, index, activity_data = op
+        self.all_activities.make_live(date_str)
+        if kind != 'remove' and activity_data['category'] not in self.all_categories:
+            # Undoing past a category deletion brings the category back along with its record.
+            self._create_category_button(activity_data['category'])
+            self.bus.emit(CategoryChanged(activity_data['category'], True))
+        if kind == 'insert':
+            self.all_activities.setdefault(date_str, []).insert(index, activity_data)
+            self.bus.emit(ActivityAdded(date_str, index, activity_data))
+            return ('remove', date_str, index, activity_data)
+        day_activities = self.all_activities[date_str]
+        if kind == 'remove':
+            removed = day_activities.pop(index)
+            if not day_activities: del self.all_activities[date_str]
+            self.bus.emit(ActivityRemoved(date_str, index, removed))
+            return ('insert', date_str, index, removed)
+        previous = day_activities[index]
+        day_activities[index] = activity_data
+        self.bus.emit(ActivityUpdated(date_str, index, previous, activity_data))
+        return ('replace', date_str, index, previous)
+
+    def _on_activity_event(self, event):
+        self.invalidate_day(event.date_str)
+        self.stats_cache.clear()
+        sign = -1 if isinstance(event, ActivityRemoved) else 1
+        if isinstance(event, ActivityUpdated):
+            self.goal_tracker.apply(event.date_str, event.previous, -1)
+            self.category_matcher.learn(event.previous['name'], event.previous['category'], -1)
+        self.goal_tracker.apply(event.date_str, event.activity, sign)
+        self.category_matcher.learn(event.activity['name'], event.activity['category'], sign)
+
+    def _on_setting_event(self, event):
+        if event.key == 'bracket_style': self.day_views.clear() # Activity column text embeds the bracket style
+        elif event.key == 'goals': self.notified_goals = self._crossed_goals()
+
+    def _refresh_views(self, events):
+        # Runs once per event-loop turn and only redraws what the batch actually touched.
+        if any(isinstance(event, CategoryChanged) for event in events):
+            self._layout_category_buttons()
+            self.update_timer_category_menu()
+            if self.current_category_filter not in self.all_categories: self.select_category_filter('All')
+        if self.pending_date is not None: return # A Prev/Next render is queued and will show fresh data
+        shown_date = self.current_date.strftime("%Y-%m-%d")
+        setting_keys = {event.key for event in events if isinstance(event, SettingChanged)}
+        activity_events = [event for event in events if isinstance(event, ACTIVITY_EVENTS)]
+        if 'bracket_style' in setting_keys or any(event.date_str == shown_date for event in activity_events):
+            self.display_data_for_date(self.current_date)
+        elif activity_events or 'goals' in setting_keys:
+            self.update_category_buttons() # Goal progress spans the week/month, not just the shown day
+
+    def _reveal_date(self, date_str):
+        # Undo/redo go to the day they changed, through the same coalesced path as Prev/Next.
+        target_date = datetime.strptime(date_str, "%Y-%m-%d").date()
+        if target_date == (self.pending_date or self.current_date): return
+        self.pending_date = target_date
+        self.date_var.set(date_str)
+        if self.nav_after_id is None: self.nav_after_id = self.after_idle(self._render_pending_date)
+
+    def set_goals(self, goals):
+        self.goal_tracker.set_goals(goals)
+        self.goal_tracker.rebuild(self.all_activities)
+        self.bus.emit(SettingChanged('goals', goals))
+
+    def _goal_summary(self, category, day, extra_seconds=0):
+        parts = []
+        for goal in self.goal_tracker.goals_for(category):
+            tracked, target = self.goal_tracker.progress(goal, day, extra_seconds)
+            if target > 0: parts.append(f"{tracked / target:.0%} {goal['period']}")
+        return f" · {', '.join(parts)}" if parts else ""
+
+    def _running_goal_state(self):
+        # (day, in-flight seconds) for the session currently counting towards a category, else None.
+        if not self.timer_running or not self.current_timer_category or self.pomodoro_state == "Break": return None
+        return self.start_time.date(), (datetime.now() - self.start_time).total_seconds()
+
+    def _crossed_goals(self):
+        state = self._running_goal_state()
+        if state is None: return set()
+        day, elapsed = state
+        crossed = set()
+        for goal in self.goal_tracker.goals_for(self.current_timer_category):
+            tracked, target = self.goal_tracker.progress(goal, day, elapsed)
+            if GoalTracker.is_crossed(goal, tracked, target): crossed.add((GoalTracker.describe(goal), GoalTracker.period_key(day, goal['period'])))
+        return crossed
+
+    def update_goal_progress(self):
+        state = self._running_goal_state()
+        if state is None:
+            if self.goal_label.cget("text"): self.goal_label.config(text="")
+            return
+        day, elapsed = state
+        lines = []
+        for goal in self.goal_tracker.goals_for(self.current_timer_category):
+            tracked, target = self.goal_tracker.progress(goal, day, elapsed)
+            lines.append(f"{GoalTracker.describe(goal)}: {tracked / 3600:.1f}h {GOAL_PERIODS[goal['period']]}")
+            goal_key = (GoalTracker.describe(goal), GoalTracker.period_key(day, goal['period']))
+            if GoalTracker.is_crossed(goal, tracked, target) and goal_key not in self.notified_goals:
+                self.notified_goals.add(goal_key)
+                if goal['kind'] == "min":
+                    ToastNotification(title="Goal Reached", message=f"{GoalTracker.describe(goal)} reached {GOAL_PERIODS[goal['period']]}.", duration=5000, bootstyle=SUCCESS).show_toast()
+                else:
+                    ToastNotification(title="Budget Exceeded", message=f"{GoalTracker.describe(goal)} exceeded {GOAL_PERIODS[goal['period']]}.", duration=5000, bootstyle=WARNING).show_toast()
+        text = "  |  ".join(lines)
+        if text != self.goal_label.cget("text"): self.goal_label.config(text=text)
 
     def edit_selected_activity(self):
         selection = self.activity_tree.selection()
@@ -581,10 +2003,58 @@ class TimeTracker(bs.Window):
         if item_id in self.tree_item_to_activity_index:
             activity_index = self.tree_item_to_activity_index[item_id]
             date_str = self.current_date.strftime("%Y-%m-%d")
-            self.all_activities[date_str].pop(activity_index)
-            if not self.all_activities[date_str]: del self.all_activities[date_str]
-            self.display_data_for_date(self.current_date)
-            self.save_all_data()
+            self.apply_activity_change(('remove', date_str, activity_index, None))
+
+    def configure_idle_detection(self):
+        minutes = simpledialog.askinteger("Idle Detection", "Minutes without keyboard/mouse input before a running timer is considered idle (0 to disable):",
+                                          initialvalue=self.idle_threshold_minutes, minvalue=0, maxvalue=480, parent=self)
+        if minutes is None: return
+        self.idle_threshold_minutes = minutes
+        self.idle_started_at = None
+        self.bus.emit(SettingChanged('idle_threshold_minutes', minutes))
+
+    def poll_idle(self):
+        self.after(IDLE_POLL_MS, self.poll_idle)
+        # Only the standard timer is trimmed; Pomodoro sessions have fixed lengths.
+        if not self.idle_threshold_minutes or not self.timer_running or self.pomodoro_mode_on.get():
+            self.idle_started_at = None
+            return
+        if self.idle_dialog is not None: return # The previous gap is still being decided
+        
+        idle_seconds = self.idle_source.idle_seconds()
+        threshold = self.idle_threshold_minutes * 60
+        if self.idle_started_at is None:
+            if idle_seconds >= threshold:
+                self.idle_started_at = max(datetime.now() - timedelta(seconds=idle_seconds), self.start_time)
+        elif idle_seconds < threshold:
+            idle_start, self.idle_started_at = self.idle_started_at, None
+            self.idle_dialog = IdleReturnDialog(self, idle_start, datetime.now() - timedelta(seconds=idle_seconds))
+
+    def _take_idle_gap(self):
+        # The unresolved (idle_start, idle_end) of the running standard session, if any. Covers a gap poll_idle
+        # has already seen the start of, and one that is still going on or ended between two polls.
+        if not self.idle_threshold_minutes or not self.timer_running or self.pomodoro_mode_on.get(): return None
+        idle_seconds = self.idle_source.idle_seconds() if self.idle_source else 0
+        now = datetime.now()
+        if self.idle_started_at is not None:
+            gap = (self.idle_started_at, now - timedelta(seconds=idle_seconds))
+        elif idle_seconds >= self.idle_threshold_minutes * 60:
+            gap = (max(now - timedelta(seconds=idle_seconds), self.start_time), now)
+        else:
+            return None
+        self.idle_started_at = None
+        return gap
+
+    def resolve_idle_gap(self, idle_start, idle_end, action, reassign_category=None):
+        if action == "keep" or not self.timer_running or idle_start < self.start_time: return
+        category, activity_name = self.current_timer_category, self.activity_name_entry.get().strip()
+        if idle_start - self.start_time >= timedelta(seconds=1):
+            self.log_activity(category, activity_name, self.start_time, idle_start, idle_start - self.start_time, self.start_time.date())
+        if action == "reassign" and reassign_category:
+            self.log_activity(reassign_category, "Away", idle_start, idle_end, idle_end - idle_start, idle_start.date())
+        # The running session continues from the moment the user came back.
+        self.start_time = idle_end
+        self.update_live_timer_display()
 
     def toggle_timer(self):
         if self.timer_running: 
@@ -595,8 +2065,18 @@ class TimeTracker(bs.Window):
             else: 
                 self.start_standard_timer()
 
-    def force_stop_timer(self):
+    def force_stop_timer(self, ask_idle=True):
         if not self.timer_running: return
+        # Stopping right after coming back must not log the time away: ask first (the dialog stops the
+        # timer once answered), or, when there is no time to ask, log only up to where the user left.
+        if self.idle_dialog is not None:
+            if ask_idle: self.idle_dialog.stop_after = True; return
+            self.idle_dialog.stop_after = False
+            self.idle_dialog.resolve("discard")
+        idle_gap = self._take_idle_gap()
+        if idle_gap:
+            if ask_idle: self.idle_dialog = IdleReturnDialog(self, *idle_gap, stop_after=True); return
+            self.resolve_idle_gap(*idle_gap, "discard")
         start_date = self.start_time.date()
         
         if not self.pomodoro_mode_on.get():
@@ -622,9 +2102,8 @@ class TimeTracker(bs.Window):
         self.update_live_timer_display()
         self.timer_label.config(bootstyle="success", text="00:00:00")
         self.start_stop_button.config(text="Start", bootstyle="success")
-        self.pomo_status_label.config(text="Status: Idle")
+        self.pomo_status_var.set("Status: Idle")
         self.update_category_button_styles()
-        self.save_all_data()
 
     def start_standard_timer(self):
         self.current_timer_category = self.timer_category_var.get()
@@ -637,6 +2116,7 @@ class TimeTracker(bs.Window):
         self.start_time = datetime.now()
         self.start_stop_button.config(text="Stop", bootstyle="danger")
         self.timer_label.config(bootstyle="info")
+        self.notified_goals = self._crossed_goals()
         self.update_category_button_styles()
         self.update_live_timer_display()
 
@@ -648,19 +2128,20 @@ class TimeTracker(bs.Window):
             messagebox.showwarning("No Activity Name", "Please enter what you are working on."); return
 
         self.pomodoro_state = "Work"
-        self.pomo_status_label.config(text="Status: Work")
+        self.pomo_status_var.set("Status: Work")
         self.timer_running = True
         self.start_time = datetime.now()
         duration = timedelta(minutes=self.pomodoro_work_minutes.get())
         self.pomodoro_end_time = self.start_time + duration
         self.start_stop_button.config(text="Stop", bootstyle="danger")
         self.timer_label.config(bootstyle="info")
+        self.notified_goals = self._crossed_goals()
         self.update_category_button_styles()
         self.update_live_timer_display()
 
     def start_pomodoro_break(self):
         self.pomodoro_state = "Break"
-        self.pomo_status_label.config(text="Status: Break")
+        self.pomo_status_var.set("Status: Break")
         self.timer_running = True
         self.start_time = datetime.now()
         duration = timedelta(minutes=self.pomodoro_break_minutes.get())
@@ -686,7 +2167,6 @@ class TimeTracker(bs.Window):
                         duration = timedelta(minutes=self.pomodoro_work_minutes.get())
                         end_time = self.start_time + duration
                         self.log_activity(self.current_timer_category, activity_name, self.start_time, end_time, duration, self.start_time.date())
-                        self.save_all_data()
                         self.start_pomodoro_break()
                     elif self.pomodoro_state == 'Break': 
                         self.force_stop_timer()
@@ -697,10 +2177,12 @@ class TimeTracker(bs.Window):
                 display_text = self.format_timedelta_colon(elapsed_time)
             
             self.timer_label.config(text=display_text)
+            self.update_goal_progress()
             title_state = self.pomodoro_state if self.pomodoro_mode_on.get() and self.pomodoro_state != "Idle" else "Tracking"
             self.title(f"{display_text} - {title_state}")
         else: 
             self.title("Simple Time Tracker")
+            self.update_goal_progress()
             
         self.after_id = self.after(200, self.update_live_timer_display)
     
@@ -711,33 +2193,17 @@ class TimeTracker(bs.Window):
         else:
             return display_columns
 
-    def _populate_activities_tree(self, activities_for_day, category_filter):
+    def _populate_activities_tree(self, date_str, category_filter):
         self.tree_item_to_activity_index.clear()
         for item in self.activity_tree.get_children(): self.activity_tree.delete(item)
         
-        indexed_activities = list(enumerate(activities_for_day))
-        sorted_indexed_activities = sorted(indexed_activities, key=lambda x: datetime.strptime(x[1]['start'], '%H:%M'))
-        
-        original_columns_order = self.activity_tree["columns"]
-        
-        prefix, suffix = ("[", "]") if self.bracket_style == "square" else ("【", "】")
+        for row in self._get_day_view(date_str)['rows']:
+            if category_filter == 'All' or row['category'] == category_filter:
+                item_id = self.activity_tree.insert("", END, values=row['values'])
+                self.tree_item_to_activity_index[item_id] = row['index']
 
-        for original_index, activity in sorted_indexed_activities:
-            if category_filter == 'All' or activity['category'] == category_filter:
-                note_icon = " 📝" if activity.get("notes") else ""
-                
-                activity_text = f"{prefix}{activity['category']}{suffix} {activity['name']}{note_icon}"
-                time_range_text = f"{activity['start']} - {activity['end']}"
-                duration_text = self.format_timedelta_hms(timedelta(seconds=activity['duration_seconds']))
-                
-                values_map = {"time": time_range_text, "activity": activity_text, "duration": duration_text, "copy": "📋"}
-                ordered_values = tuple(values_map[col_id] for col_id in original_columns_order)
-
-                item_id = self.activity_tree.insert("", END, values=ordered_values)
-                self.tree_item_to_activity_index[item_id] = original_index
-
-                if note_icon:
-                    ToolTip(self.activity_tree, text=activity.get("notes", ""), bootstyle=(INFO, INVERSE), for_item=item_id)
+                if row['notes']:
+                    ToolTip(self.activity_tree, text=row['notes'], bootstyle=(INFO, INVERSE), for_item=item_id)
 
     def update_total_time_display(self):
         category_name = self.current_category_filter
@@ -749,8 +2215,11 @@ class TimeTracker(bs.Window):
 
     def update_category_buttons(self):
         for name, data in self.all_categories.items():
-            formatted_time = self.format_timedelta_hms(data['total'])
-            if 'button' in data: data['button'].config(text=f"{name} {formatted_time}")
+            if 'button' not in data: continue
+            goal_summary = self._goal_summary(name, self.current_date)
+            if data.get('rendered_total') == (data['total'], goal_summary): continue
+            self._render_category_button(data, text=f"{name} {self.format_timedelta_hms(data['total'])}{goal_summary}")
+            data['rendered_total'] = (data['total'], goal_summary)
         self.update_category_button_styles()
             
     def update_timer_category_menu(self):
@@ -890,6 +2359,8 @@ class ManualAddWindow(tk.Toplevel):
         if self.edit_mode and self.activity_data: self.populate_fields()
         elif hasattr(self, 'categories') and self.categories:
              self.category_menu.set(self.categories[0])
+        self.auto_category = None if self.edit_mode else self.category_var.get() # Replaced as you type until picked by hand
+        self.name_entry.bind("<KeyRelease>", self.suggest_category)
         self.name_entry.focus_set()
 
     def setup_form(self, frame):
@@ -924,6 +2395,14 @@ class ManualAddWindow(tk.Toplevel):
         x = parent_x + (parent_w // 2) - (win_w // 2); y = parent_y + (parent_h // 2) - (win_h // 2)
         self.geometry(f"+{x}+{y}")
 
+    def suggest_category(self, event=None):
+        name = self.name_entry.get().strip()
+        if not name or self.category_var.get() != self.auto_category: return
+        suggestion = self.parent.category_matcher.match(name)
+        if suggestion in self.categories:
+            self.category_var.set(suggestion)
+            self.auto_category = suggestion
+
     def populate_fields(self):
         self.category_var.set(self.activity_data.get('category')); self.name_entry.insert(0, self.activity_data.get('name'))
         self.start_entry.insert(0, self.activity_data.get('start')); self.end_entry.insert(0, self.activity_data.get('end'))
@@ -947,15 +2426,379 @@ class ManualAddWindow(tk.Toplevel):
 
         date_str = self.activity_date.strftime("%Y-%m-%d")
         if self.edit_mode:
-            self.parent.all_activities[date_str][self.activity_index] = new_activity_data
+            self.parent.apply_activity_change(('replace', date_str, self.activity_index, new_activity_data))
         else:
-            if date_str not in self.parent.all_activities: self.parent.all_activities[date_str] = []
-            self.parent.all_activities[date_str].append(new_activity_data)
-        
-        self.parent.display_data_for_date(self.activity_date)
-        self.parent.save_all_data(); self.destroy()
+            self.parent.apply_activity_change(('insert', date_str, len(self.parent.all_activities.get(date_str, [])), new_activity_data))
+        self.destroy()
+
+class IdleReturnDialog(tk.Toplevel):
+    def __init__(self, parent, idle_start, idle_end, stop_after=False):
+        super().__init__(parent)
+        self.parent = parent; self.idle_start = idle_start; self.idle_end = idle_end
+        self.stop_after = stop_after # Set when the user pressed Stop; the timer stops once the gap is resolved
+        self.title("Welcome Back"); self.transient(parent); self.grab_set()
+        self.protocol("WM_DELETE_WINDOW", lambda: self.resolve("keep"))
+        frame = ttk.Frame(self, padding=20); frame.pack(fill=BOTH, expand=YES)
+        away = parent.format_timedelta_hms(idle_end - idle_start)
+        ttk.Label(frame, text=f"You were away from {idle_start.strftime('%H:%M')} to {idle_end.strftime('%H:%M')} ({away}).\nWhat should happen to that time?", justify=LEFT).pack(anchor=W, pady=(0, 15))
+
+        reassign_frame = ttk.Frame(frame); reassign_frame.pack(fill=X, pady=(0, 15))
+        self.category_var = tk.StringVar()
+        categories = [cat for cat in parent.all_categories if cat != 'All']
+        ttk.Button(reassign_frame, text="Reassign to:", command=lambda: self.resolve("reassign"), bootstyle="info").pack(side=LEFT)
+        ttk.Combobox(reassign_frame, textvariable=self.category_var, values=categories, state="readonly", width=15).pack(side=LEFT, padx=10)
+        if categories: self.category_var.set(categories[0])
+
+        button_frame = ttk.Frame(frame); button_frame.pack()
+        ttk.Button(button_frame, text="Keep", command=lambda: self.resolve("keep"), bootstyle="success").pack(side=LEFT, padx=10)
+        ttk.Button(button_frame, text="Discard", command=lambda: self.resolve("discard"), bootstyle="danger").pack(side=LEFT, padx=10)
+        self.bell()
+
+    def resolve(self, action):
+        self.destroy()
+        self.parent.idle_dialog = None
+        self.parent.resolve_idle_gap(self.idle_start, self.idle_end, action, self.category_var.get())
+        if self.stop_after: self.parent.force_stop_timer(ask_idle=False)
+
+class TeamReportWindow(tk.Toplevel):
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.parent = parent; self.worker = None; self.result = None
+        self.title("Team Report"); self.transient(parent)
+        frame = ttk.Frame(self, padding=20); frame.pack(fill=BOTH, expand=YES)
+        self.setup_form(frame); self.geometry("560x480")
+
+    def setup_form(self, frame):
+        frame.columnconfigure(1, weight=1); frame.rowconfigure(3, weight=1)
+        ttk.Label(frame, text="Folder:").grid(row=0, column=0, sticky=W, pady=5)
+        self.directory_var = tk.StringVar()
+        ttk.Entry(frame, textvariable=self.directory_var).grid(row=0, column=1, sticky=EW, pady=5, padx=5)
+        ttk.Button(frame, text="Browse...", command=self.browse, bootstyle="secondary").grid(row=0, column=2, pady=5)
+
+        range_frame = ttk.Frame(frame); range_frame.grid(row=1, column=0, columnspan=3, sticky=EW, pady=5)
+        self.from_var, self.to_var = tk.StringVar(), tk.StringVar()
+        ttk.Label(range_frame, text="From (YYYY-MM-DD):").pack(side=LEFT)
+        ttk.Entry(range_frame, textvariable=self.from_var, width=11).pack(side=LEFT, padx=5)
+        ttk.Label(range_frame, text="To:").pack(side=LEFT)
+        ttk.Entry(range_frame, textvariable=self.to_var, width=11).pack(side=LEFT, padx=5)
+        self.run_button = ttk.Button(range_frame, text="Run", command=self.run_report, bootstyle="success")
+        self.run_button.pack(side=RIGHT)
+
+        self.status_label = ttk.Label(frame, text="Each data file (or folder holding a time_tracker_data file) counts as one person.", font=("Helvetica", 9, "italic"))
+        self.status_label.grid(row=2, column=0, columnspan=3, sticky=W, pady=5)
+        self.output_text = tk.Text(frame, wrap=NONE, height=15); self.output_text.grid(row=3, column=0, columnspan=3, sticky=NSEW)
+        ttk.Button(frame, text="Copy", command=self.copy_report, bootstyle="link").grid(row=4, column=0, sticky=W, pady=(5, 0))
+
+    def browse(self):
+        directory = filedialog.askdirectory(title="Select Folder with Data Files", parent=self)
+        if directory: self.directory_var.set(directory)
+
+    def run_report(self):
+        directory = self.directory_var.get().strip()
+        if not os.path.isdir(directory): messagebox.showerror("Input Error", "Please choose an existing folder.", parent=self); return
+        start_str, end_str = self.from_var.get().strip() or None, self.to_var.get().strip() or None
+        if not all(is_iso_date(value) for value in (start_str, end_str) if value):
+            messagebox.showerror("Invalid Format", "Please enter dates in YYYY-MM-DD format.", parent=self); return
+
+        # The process pool is driven from a helper thread so the window stays responsive; only after() touches Tk.
+        self.run_button.config(state=DISABLED); self.status_label.config(text="Running...")
+        self.result = None
+        self.worker = threading.Thread(target=self._run_in_background, args=(directory, start_str, end_str), daemon=True)
+        self.worker.start()
+        self.after(200, self._check_done)
+
+    def _run_in_background(self, directory, start_str, end_str):
+        try:
+            self.result = format_team_report(build_team_report(directory, start_str, end_str), start_str, end_str)
+        except Exception as e:
+            self.result = f"Failed to build the report.\nError: {e}"
+
+    def _check_done(self):
+        if not self.winfo_exists(): return
+        if self.worker.is_alive(): self.after(200, self._check_done); return
+        self.run_button.config(state=NORMAL); self.status_label.config(text="Done.")
+        self.output_text.delete("1.0", END); self.output_text.insert(END, self.result)
+
+    def copy_report(self):
+        self.clipboard_clear(); self.clipboard_append(self.output_text.get("1.0", END).strip())
+
+class StatisticsWindow(tk.Toplevel):
+    RANGES = ("Last 30 days", "Last 12 weeks", "Last 12 months", "This year", "All time")
+    TABS = (("categories", "Categories"), ("rhythm", "Weekday / Hour"), ("names", "Top Activities"))
+    BAR_MIN_WIDTH = 6 # px; more buckets than fit at this width are merged by downsample()
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.parent = parent; self.redraw_after_id = None
+        self.title("Statistics"); self.transient(parent); self.geometry("720x460")
+        frame = ttk.Frame(self, padding=15); frame.pack(fill=BOTH, expand=YES)
+        self.setup_form(frame); self.after_idle(self.redraw)
+
+    def setup_form(self, frame):
+        controls = ttk.Frame(frame); controls.pack(fill=X, pady=(0, 10))
+        self.range_var = tk.StringVar(value=self.RANGES[0]); self.grouping_var = tk.StringVar(value="day")
+        ttk.Label(controls, text="Range:").pack(side=LEFT)
+        range_menu = ttk.Combobox(controls, textvariable=self.range_var, values=self.RANGES, state="readonly", width=15); range_menu.pack(side=LEFT, padx=(5, 15))
+        ttk.Label(controls, text="Group by:").pack(side=LEFT)
+        grouping_menu = ttk.Combobox(controls, textvariable=self.grouping_var, values=STATS_GROUPINGS, state="readonly", width=8); grouping_menu.pack(side=LEFT, padx=5)
+        range_menu.bind("<<ComboboxSelected>>", lambda event: self.redraw()); grouping_menu.bind("<<ComboboxSelected>>", lambda event: self.redraw())
+
+        self.notebook = ttk.Notebook(frame); self.notebook.pack(fill=BOTH, expand=YES)
+        self.canvases = {}
+        for key, label in self.TABS:
+            canvas = tk.Canvas(self.notebook, highlightthickness=0, background=self.parent.style.colors.bg)
+            canvas.bind("<Configure>", self.schedule_redraw)
+            self.notebook.add(canvas, text=label); self.canvases[key] = canvas
+        self.notebook.bind("<<NotebookTabChanged>>", lambda event: self.redraw())
+
+    def schedule_redraw(self, event=None):
+        # Resizing fires many <Configure> events; only the last one redraws.
+        if self.redraw_after_id: self.after_cancel(self.redraw_after_id)
+        self.redraw_after_id = self.after(100, self.redraw)
+
+    def date_range(self):
+        today = date.today(); choice = self.range_var.get()
+        if choice == "Last 30 days": return today - timedelta(days=29), today
+        if choice == "Last 12 weeks": return today - timedelta(weeks=12) + timedelta(days=1), today
+        if choice == "Last 12 months": return _next_bucket(date(today.year - 1, today.month, 1), "month"), today
+        if choice == "This year": return date(today.year, 1, 1), today
+        days = sorted(self.parent.all_activities)
+        return (datetime.strptime(days[0], "%Y-%m-%d").date() if days else today), today
+
+    def chart_data(self, chart):
+        # Aggregates are cached on the app per (range, grouping, chart) and dropped whenever activities change.
+        start_day, end_day = self.date_range()
+        grouping = self.grouping_var.get() if chart == "categories" else None
+        key = (start_day, end_day, grouping, chart)
+        if key not in self.parent.stats_cache:
+            activities = self.parent.all_activities
+            if chart == "categories": data = category_series(activities, start_day, end_day, grouping)
+            elif chart == "rhythm": data = weekday_hour_distribution(activities, start_day, end_day)
+            else: data = top_activity_names(activities, start_day, end_day)
+            self.parent.stats_cache[key] = data
+        return self.parent.stats_cache[key]
+
+    def redraw(self):
+        self.redraw_after_id = None
+        if not self.winfo_exists(): return
+        chart = self.TABS[self.notebook.index(self.notebook.select())][0]
+        canvas = self.canvases[chart]
+        canvas.delete("all")
+        width, height = canvas.winfo_width(), canvas.winfo_height()
+        if width < 50 or height < 50: return
+        getattr(self, f"draw_{chart}")(canvas, self.chart_data(chart), width, height)
+
+    def palette(self):
+        colors = self.parent.style.colors
+        return [colors.primary, colors.success, colors.info, colors.warning, colors.danger, colors.secondary, "#8e44ad", "#16a085", "#d35400", "#7f8c8d"]
+
+    def draw_categories(self, canvas, data, width, height):
+        buckets, series = data
+        left, top, bottom = 50, 30, 25
+        plot_w, plot_h = width - left - 10, height - top - bottom
+        labels, series = downsample(buckets, series, max(1, plot_w // self.BAR_MIN_WIDTH))
+        if not labels: return
+        fg, palette = self.parent.style.colors.fg, self.palette()
+        names = sorted(series, key=lambda name: -sum(series[name]))
+        stack_max = max((sum(series[name][i] for name in names) for i in range(len(labels))), default=0) or 1
+        bar_w = plot_w / len(labels)
+
+        for i in range(len(labels)):
+            y = top + plot_h
+            for n, name in enumerate(names):
+                bar_h = series[name][i] / stack_max * plot_h
+                if bar_h > 0:
+                    x0 = left + i * bar_w
+                    canvas.create_rectangle(x0 + 1, y - bar_h, x0 + max(bar_w - 1, 2), y, fill=palette[n % len(palette)], width=0)
+                    y -= bar_h
+        canvas.create_line(left, top + plot_h, left + plot_w, top + plot_h, fill=fg)
+        canvas.create_text(left - 5, top, text=f"{stack_max / 3600:.1f}h", anchor=E, fill=fg, font=("Helvetica", 8))
+        label_every = max(1, len(labels) // max(1, plot_w // 70))
+        for i in range(0, len(labels), label_every):
+            canvas.create_text(left + (i + 0.5) * bar_w, top + plot_h + 12, text=labels[i].strftime("%m-%d" if self.grouping_var.get() != "month" else "%Y-%m"), fill=fg, font=("Helvetica", 8))
+        x = left
+        for n, name in enumerate(names[:len(palette)]):
+            canvas.create_rectangle(x, 8, x + 10, 18, fill=palette[n], width=0)
+            label = canvas.create_text(x + 14, 13, text=str(name), anchor=W, fill=fg, font=("Helvetica", 9))
+            x = canvas.bbox(label)[2] + 12
+
+    def draw_rhythm(self, canvas, grid, width, height):
+        left, top = 40, 20
+        cell_w, cell_h = (width - left - 10) / 24, (height - top - 10) / 7
+        fg, bg = self.parent.style.colors.fg, self.parent.style.colors.bg
+        peak = max(max(row) for row in grid) or 1
+        low, high = self._rgb(bg), self._rgb(self.parent.style.colors.primary)
+        for d, day_name in enumerate(("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")):
+            canvas.create_text(left - 5, top + (d + 0.5) * cell_h, text=day_name, anchor=E, fill=fg, font=("Helvetica", 8))
+            for h in range(24):
+                t = grid[d][h] / peak
+                color = "#%02x%02x%02x" % tuple(int(l + (hi - l) * t) for l, hi in zip(low, high))
+                canvas.create_rectangle(left + h * cell_w, top + d * cell_h, left + (h + 1) * cell_w - 1, top + (d + 1) * cell_h - 1, fill=color, width=0)
+        for h in range(0, 24, 3):
+            canvas.create_text(left + (h + 0.5) * cell_w, top - 8, text=f"{h:02}", fill=fg, font=("Helvetica", 8))
+
+    def draw_names(self, canvas, items, width, height):
+        if not items: return
+        left, row_h = min(220, width // 3), min(28, (height - 20) / len(items))
+        fg, color = self.parent.style.colors.fg, self.parent.style.colors.info
+        peak = items[0][1] or 1
+        for i, (name, seconds) in enumerate(items):
+            y = 10 + i * row_h
+            canvas.create_text(left - 8, y + row_h / 2, text=name[:30], anchor=E, fill=fg, font=("Helvetica", 9))
+            bar_w = (width - left - 80) * seconds / peak
+            canvas.create_rectangle(left, y + 3, left + bar_w, y + row_h - 3, fill=color, width=0)
+            canvas.create_text(left + bar_w + 6, y + row_h / 2, text=f"{seconds / 3600:.1f}h", anchor=W, fill=fg, font=("Helvetica", 9))
+
+    def _rgb(self, color):
+        return tuple(v // 256 for v in self.winfo_rgb(color))
+
+class GoalsWindow(tk.Toplevel):
+    KINDS = {"At least": "min", "At most": "max"}
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.parent = parent; self.goals = list(parent.goal_tracker.goals)
+        self.title("Goals & Budgets"); self.transient(parent); self.grab_set()
+        frame = ttk.Frame(self, padding=20); frame.pack(fill=BOTH, expand=YES)
+        self.setup_form(frame); self.refresh_list(); self.center_window()
+
+    def setup_form(self, frame):
+        frame.columnconfigure(0, weight=1); frame.rowconfigure(0, weight=1)
+        self.goal_list = ttk.Treeview(frame, columns=("goal",), show="", height=6, selectmode="browse")
+        self.goal_list.grid(row=0, column=0, columnspan=2, sticky=NSEW)
+        ttk.Button(frame, text="Remove Selected", command=self.remove_goal, bootstyle="danger-link").grid(row=1, column=0, sticky=W, pady=(5, 10))
+
+        form = ttk.Frame(frame); form.grid(row=2, column=0, columnspan=2, sticky=EW)
+        self.category_var = tk.StringVar(); self.kind_var = tk.StringVar(value="At least")
+        self.hours_var = tk.StringVar(value="1"); self.period_var = tk.StringVar(value="day")
+        categories = [cat for cat in self.parent.all_categories if cat != 'All']
+        ttk.Combobox(form, textvariable=self.category_var, values=categories, state="readonly", width=12).pack(side=LEFT, padx=(0, 5))
+        ttk.Combobox(form, textvariable=self.kind_var, values=list(self.KINDS), state="readonly", width=8).pack(side=LEFT, padx=5)
+        ttk.Entry(form, textvariable=self.hours_var, width=5).pack(side=LEFT, padx=5); ttk.Label(form, text="h per").pack(side=LEFT)
+        ttk.Combobox(form, textvariable=self.period_var, values=list(GOAL_PERIODS), state="readonly", width=7).pack(side=LEFT, padx=5)
+        ttk.Button(form, text="Add", command=self.add_goal, bootstyle="info").pack(side=LEFT, padx=(5, 0))
+        if categories: self.category_var.set(categories[0])
+
+        button_frame = ttk.Frame(frame); button_frame.grid(row=3, column=0, columnspan=2, pady=(20, 0))
+        ttk.Button(button_frame, text="Save", command=self.save_goals, bootstyle="success").pack(side=LEFT, padx=10)
+        ttk.Button(button_frame, text="Cancel", command=self.destroy, bootstyle="secondary").pack(side=LEFT, padx=10)
+
+    def center_window(self):
+        self.update_idletasks(); self.minsize(450, 300)
+        x = self.parent.winfo_x() + (self.parent.winfo_width() // 2) - (self.winfo_reqwidth() // 2)
+        y = self.parent.winfo_y() + (self.parent.winfo_height() // 2) - (self.winfo_reqheight() // 2)
+        self.geometry(f"+{x}+{y}")
+
+    def refresh_list(self):
+        for item in self.goal_list.get_children(): self.goal_list.delete(item)
+        for goal in self.goals: self.goal_list.insert("", END, values=(GoalTracker.describe(goal),))
+
+    def add_goal(self):
+        try: hours = float(self.hours_var.get())
+        except ValueError: messagebox.showerror("Input Error", "Hours must be a number.", parent=self); return
+        if not self.category_var.get() or hours <= 0: messagebox.showerror("Input Error", "Pick a category and a positive number of hours.", parent=self); return
+        self.goals.append({'category': self.category_var.get(), 'period': self.period_var.get(), 'kind': self.KINDS[self.kind_var.get()], 'hours': hours})
+        self.refresh_list()
+
+    def remove_goal(self):
+        selection = self.goal_list.selection()
+        if not selection: return
+        del self.goals[self.goal_list.index(selection[0])]
+        self.refresh_list()
+
+    def save_goals(self):
+        self.parent.set_goals(self.goals); self.destroy()
+
+class CategoryRulesWindow(tk.Toplevel):
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.parent = parent; self.rules = list(parent.category_matcher.rules)
+        self.title("Category Rules"); self.transient(parent); self.grab_set()
+        frame = ttk.Frame(self, padding=20); frame.pack(fill=BOTH, expand=YES)
+        self.setup_form(frame); self.refresh_list(); self.center_window()
+
+    def setup_form(self, frame):
+        frame.columnconfigure(0, weight=1); frame.rowconfigure(1, weight=1)
+        ttk.Label(frame, text="Names you have logged before keep their usual category. Otherwise the rule matching earliest in the name applies; on a tie, keywords (longest first) go before regexes, and regexes in list order.", wraplength=420).grid(row=0, column=0, columnspan=2, sticky=W, pady=(0, 5))
+        self.rule_list = ttk.Treeview(frame, columns=("rule",), show="", height=8, selectmode="browse")
+        self.rule_list.grid(row=1, column=0, columnspan=2, sticky=NSEW)
+        ttk.Button(frame, text="Remove Selected", command=self.remove_rule, bootstyle="danger-link").grid(row=2, column=0, sticky=W, pady=(5, 10))
+
+        form = ttk.Frame(frame); form.grid(row=3, column=0, columnspan=2, sticky=EW)
+        self.kind_var = tk.StringVar(value="Keyword"); self.pattern_var = tk.StringVar(); self.category_var = tk.StringVar()
+        categories = [cat for cat in self.parent.all_categories if cat != 'All']
+        ttk.Combobox(form, textvariable=self.kind_var, values=list(RULE_KINDS), state="readonly", width=8).pack(side=LEFT, padx=(0, 5))
+        ttk.Entry(form, textvariable=self.pattern_var, width=18).pack(side=LEFT, padx=5); ttk.Label(form, text="→").pack(side=LEFT)
+        ttk.Combobox(form, textvariable=self.category_var, values=categories, state="readonly", width=12).pack(side=LEFT, padx=5)
+        ttk.Button(form, text="Add", command=self.add_rule, bootstyle="info").pack(side=LEFT, padx=(5, 0))
+        if categories: self.category_var.set(categories[0])
+
+        button_frame = ttk.Frame(frame); button_frame.grid(row=4, column=0, columnspan=2, pady=(20, 0))
+        ttk.Button(button_frame, text="Save", command=self.save_rules, bootstyle="success").pack(side=LEFT, padx=10)
+        ttk.Button(button_frame, text="Cancel", command=self.destroy, bootstyle="secondary").pack(side=LEFT, padx=10)
+
+    def center_window(self):
+        self.update_idletasks(); self.minsize(450, 350)
+        x = self.parent.winfo_x() + (self.parent.winfo_width() // 2) - (self.winfo_reqwidth() // 2)
+        y = self.parent.winfo_y() + (self.parent.winfo_height() // 2) - (self.winfo_reqheight() // 2)
+        self.geometry(f"+{x}+{y}")
+
+    def refresh_list(self):
+        for item in self.rule_list.get_children(): self.rule_list.delete(item)
+        for rule in self.rules:
+            pattern = f"'{rule['pattern']}'" if rule['kind'] == "keyword" else f"/{rule['pattern']}/"
+            self.rule_list.insert("", END, values=(f"{rule['kind'].capitalize()} {pattern} → {rule['category']}",))
+
+    def add_rule(self):
+        rule = {'kind': RULE_KINDS[self.kind_var.get()], 'pattern': self.pattern_var.get().strip(), 'category': self.category_var.get()}
+        if not rule['pattern'] or not rule['category']: messagebox.showerror("Input Error", "Enter a pattern and pick a category.", parent=self); return
+        try: compile_rule(rule)
+        except re.error as e: messagebox.showerror("Input Error", f"Invalid regular expression: {e}", parent=self); return
+        self.rules.append(rule); self.pattern_var.set("")
+        self.refresh_list()
+
+    def remove_rule(self):
+        selection = self.rule_list.selection()
+        if not selection: return
+        del self.rules[self.rule_list.index(selection[0])]
+        self.refresh_list()
+
+    def save_rules(self):
+        self.parent.set_category_rules(self.rules); self.destroy()
+
+def _iso_date(value):
+    if not is_iso_date(value): raise argparse.ArgumentTypeError(f"invalid date '{value}', expected YYYY-MM-DD")
+    return value
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Simple Time Tracker")
+    parser.add_argument("--team-report", metavar="DIR", help="print per-person and per-category totals for every data file in DIR and exit")
+    parser.add_argument("--from", dest="start", type=_iso_date, metavar="YYYY-MM-DD", help="first day included in a report")
+    parser.add_argument("--to", dest="end", type=_iso_date, metavar="YYYY-MM-DD", help="last day included in a report")
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes for reports (default: CPU count)")
+    parser.add_argument("--check", nargs="?", const="", metavar="FILE", help="validate and repair a data file (default: the live data file) and exit")
+    parser.add_argument("--dry-run", action="store_true", help="with --check, only report problems")
+    return parser.parse_args(argv)
 
 if __name__ == "__main__":
+    args = parse_args()
+    if args.team_report:
+        report = build_team_report(os.path.abspath(args.team_report), args.start, args.end, args.jobs)
+        print(format_team_report(report, args.start, args.end))
+        sys.exit(0)
+    if args.check is not None:
+        check_path = args.check
+        if not check_path:
+            os.chdir(os.path.dirname(os.path.abspath(__file__)))
+            check_path = SNAPSHOT_FILE if os.path.exists(SNAPSHOT_FILE) else DATA_FILE
+        try:
+            stats = check_and_repair(check_path, lambda done, total: print(f"  {done}/{total} days", file=sys.stderr), args.dry_run)
+        except (OSError, ValueError, struct.error) as e: # json.JSONDecodeError is a ValueError
+            print(f"Could not read {check_path}: {e}", file=sys.stderr)
+            sys.exit(1)
+        print(format_check_report(stats, args.dry_run))
+        sys.exit(0)
+
     app = None
     try:
         script_dir = os.path.dirname(os.path.abspath(__file__))